@@ -1,8 +1,17 @@
 import numpy as np
 import math
 import random
+import time
+import itertools
+import collections
+import multiprocessing
 from scipy import sparse
 import networkx as nx
+import algorithm.evaluate as ae
+import algorithm.cascade_log as cl
+import algorithm.graph_store as gs
+import algorithm.lsh as al
+from algorithm.profiling import maybe_phase
 
 # -------------------- #
 #       Cascase        #
@@ -19,8 +28,9 @@ def cascade(A, v_time, v_state, p, k):
     A: n x n scipy sparse matrix
         The adjacency matrix of the graph
 
-    p: float (0, 1)
-        The default transmission probability
+    p: float (0, 1) or None
+        The default transmission probability; None reads the probability
+        of each edge from the data of A, see log_transmission()
 
     v_time: n x 1 numpy vector
         The initial infection time of each vertex
@@ -46,6 +56,9 @@ def cascade(A, v_time, v_state, p, k):
     one = np.ones((n, 1), dtype = 'float')
     zero = np.zeros((n, 1), dtype = 'float')
 
+    # log(1 - p_e) of each edge for per-edge probabilities
+    A_log = log_transmission(A) if p is None else None
+
     # The infected vector: b_2
     b_2 = v_state
 
@@ -61,12 +74,16 @@ def cascade(A, v_time, v_state, p, k):
         b_4_last = b_4 
         b_2_last = b_2
 
-        # The # of infected neighbors of each v
-        d = A @ b_2_last
+        # The probability of each v to escape all its infected neighbors
+        if A_log is None:
+            # The # of infected neighbors of each v
+            d = A @ b_2_last
+            temp = np.full((n, 1), 1.0 - p)
+            q = np.power(temp, d)
+        else:
+            q = np.exp(A_log @ b_2_last)
 
         # Compute the newly infected nodes
-        temp = np.full((n, 1), 1.0 - p)
-        q = np.power(temp, d)
         q = np.multiply(b_4_last, one - q)
 
         # Has to flatten q to pass it to the binomial funciton
@@ -96,10 +113,911 @@ def cascade(A, v_time, v_state, p, k):
     print("the maximum number of iterations is reached")
     return v_state, v_time
 
+# -------------------------------- #
+#       Batched Cascade Engine     #
+# -------------------------------- #
+NEVER = -1 # The infection day of a vertex that was never infected
+
+
+def day_dtype(k):
+    """
+    Returns the smallest integer dtype that holds the infection days of k-day cascades.
+    """
+    return 'int16' if k < np.iinfo('int16').max else 'int32'
+
+
+LOG_ZERO = -50.0 # log(1 - p_e) used for p_e = 1, so that no -inf enters the sparse products
+
+
+def log_transmission(A):
+    """
+    Description
+    -----------
+    The weighted mode of the simulators: the data of A holds the
+    transmission probability p_e of each edge, and a vertex with infected
+    neighbours N escapes infection with probability prod_{e in N} (1 - p_e)
+    = exp(sum_{e in N} log(1 - p_e)). This returns A_log, with the sparsity
+    of A and log(1 - p_e) as data, so the infection probabilities of a day
+    are 1 - exp(A_log @ infected): one sparse product, as in the uniform case.
+
+    Output
+    ------
+    A_log: n x n scipy sparse csr matrix
+    """
+    A_log = sparse.csr_matrix(A, dtype = 'float64', copy = True)
+    A_log.data = np.maximum(np.log1p(-np.minimum(A_log.data, 1.0)), LOG_ZERO)
+    return A_log
+
+
+def cascade_batch(A, v_day, p, k, rng = None):
+    """
+    Description
+    -----------
+    This function computes C independent cascades at once. The dynamic is
+    the same as in cascade(), but the state of every cascade is a column of
+    an n x C matrix, so each day takes one sparse matrix-matrix product
+    instead of C matrix-vector products. Cascades that have died out are
+    dropped from the active batch.
+
+    The state is compact: v_day holds the infection day of each vertex
+    (the initial infections are on day 0) and NEVER for vertices that were
+    never infected, and the infected / ever-infected sets are boolean
+    matrices updated with bitwise operations.
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of the graph
+
+    v_day: n x C integer numpy matrix
+        The initial infections of each cascade: 0 for the infected vertices, NEVER otherwise
+
+    p: float (0, 1) or None
+        The default transmission probability; None reads the probability
+        of each edge from the data of A, see log_transmission()
+
+    k: integer > 0
+        The maximum number of iterations
+
+    rng: numpy Generator (optional)
+        The random stream to draw from; np.random is used when omitted
+
+    Output
+    ------
+    v_day: n x C integer numpy array
+        The infection day of each vertex in each cascade, NEVER if it was not infected
+    """
+
+    if rng is None:
+        rng = np.random
+
+    # Do not write into the caller's matrix
+    v_day = np.array(v_day, dtype = day_dtype(k))
+
+    # log(1 - p_e) of each edge for per-edge probabilities
+    A_log = log_transmission(A) if p is None else None
+
+    # The infected matrix: b_2
+    b_2 = v_day == 0
+
+    # The columns (cascades) that still have infected vertices
+    active = np.flatnonzero(b_2.any(axis = 0))
+    b_2 = b_2[:, active]
+
+    # The infected or recovered matrix; the susceptible vertices are its complement
+    infected = v_day[:, active] != NEVER
+
+    for day in range(1, k - 1):
+        if active.size == 0: # A fixed point is reached under zero infection
+            return v_day
+
+        if A_log is None:
+            # The # of infected neighbors of each v in each cascade: one SpMM
+            d = A @ b_2.view('uint8')
+        else:
+            # The log-probability of each v to escape its infected neighbors: one SpMM
+            d = A_log @ b_2.view('uint8')
+
+        # Only susceptible vertices with an infected neighbor can be infected
+        rows, cols = np.nonzero((d != 0) & ~infected)
+
+        # Compute newly infected nodes, drawing only for those candidates
+        if A_log is None:
+            q = 1.0 - np.power(1.0 - p, d[rows, cols])
+        else:
+            q = -np.expm1(d[rows, cols])
+        hit = rng.random(q.size) < q
+        rows, cols = rows[hit], cols[hit]
+
+        # Update b_2 (the infected vertices recover after one day) and the infected matrix
+        b_2 = np.zeros(b_2.shape, dtype = 'bool')
+        b_2[rows, cols] = True
+        infected |= b_2
+
+        # Update v_day of the active cascades
+        v_day[rows, active[cols]] = day
+
+        # Drop the cascades that have died out
+        alive = b_2.any(axis = 0)
+        if not alive.all():
+            active = active[alive]
+            b_2 = b_2[:, alive]
+            infected = infected[:, alive]
+
+    if active.size != 0:
+        print("the maximum number of iterations is reached")
+    return v_day
+
+
+def run_cascades(A, p, k, num_of_cascade, rng = None):
+    """
+    Description
+    -----------
+    Runs num_of_cascade cascades, each from a single uniformly chosen
+    infected vertex, through the batched engine.
+
+    Parameters
+    ----------
+    A: The adjacency matrix of the graph
+    p: The default transmission probability (None: per-edge, from the data of A)
+    k: The maximum number of days (iterations) for each cascade
+    num_of_cascade: The number of cascades to run
+    rng: The numpy Generator to draw from (optional)
+
+    Output
+    ------
+    v_day: n x num_of_cascade integer numpy array, one column per cascade, see cascade_batch()
+    """
+    n = np.shape(A)[0]
+
+    # Initially only one infected vertex in each cascade, on day 0
+    if rng is None:
+        infected = [random.randint(0, n-1) for _ in range(num_of_cascade)]
+    else:
+        infected = rng.integers(0, n, size = num_of_cascade)
+    v_day = np.full((n, num_of_cascade), NEVER, dtype = day_dtype(k))
+    v_day[infected, np.arange(num_of_cascade)] = 0
+
+    return cascade_batch(A, v_day, p, k, rng)
+
+# ------------------------------------------------ #
+#       Frontier-based (event-driven) Cascades     #
+# ------------------------------------------------ #
+def run_cascades_frontier(A, p, k, num_of_cascade, rng = None):
+    """
+    Description
+    -----------
+    Runs num_of_cascade cascades with the same dynamic as cascade(), but
+    keeps only the active frontier (the vertices infected the day before).
+    Each day touches only the CSR rows of the frontier and draws random
+    numbers only for its susceptible neighbours, so the cost of a cascade
+    scales with its size rather than with n times the number of days.
+
+    Parameters
+    ----------
+    A: The adjacency matrix of the graph
+    p: The default transmission probability (None: per-edge, from the data of A)
+    k: The maximum number of days (iterations) for each cascade
+    num_of_cascade: The number of cascades to run
+    rng: The numpy Generator to draw from (optional)
+
+    Output
+    ------
+    offsets, nodes, days: The cascades as cascade log columns, see cascade_log.encode()
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    A = sparse.csr_matrix(A)
+    n = np.shape(A)[0]
+    indptr, indices = A.indptr, A.indices
+
+    # log(1 - p_e) of each edge, aligned with indices, for per-edge probabilities
+    log_data = log_transmission(A).data if p is None else None
+
+    # Scratch flags shared by all cascades; only the touched entries are reset
+    infected = np.zeros(n, dtype = 'bool')
+
+    offsets = [0]
+    nodes = []
+    days = []
+    for _ in range(num_of_cascade):
+        frontier = np.array([rng.integers(0, n)]) # Initially only one infected vertex
+        infected[frontier] = True
+        cascade_nodes = [frontier]
+        cascade_days = [np.zeros(1, dtype = 'int64')] # The initial infection is on day 0
+
+        for day in range(1, k - 1):
+            # The neighbours of the frontier, once per infected neighbour
+            starts = indptr[frontier]
+            lengths = indptr[frontier + 1] - starts
+            position = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+            neighbours = indices[position]
+            susceptible = ~infected[neighbours]
+            neighbours = neighbours[susceptible]
+
+            if log_data is None:
+                # The # of infected neighbors d of each susceptible neighbour
+                candidates, d = np.unique(neighbours, return_counts = True)
+                q = 1.0 - np.power(1.0 - p, d)
+            else:
+                # The summed log(1 - p_e) over the infected neighbours of each susceptible neighbour
+                candidates, inverse = np.unique(neighbours, return_inverse = True)
+                q = -np.expm1(np.bincount(inverse, weights = log_data[position[susceptible]], minlength = candidates.size))
+            frontier = candidates[rng.random(candidates.size) < q]
+            if frontier.size == 0: # A fixed point is reached under zero infection
+                break
+
+            infected[frontier] = True
+            cascade_nodes.append(frontier)
+            cascade_days.append(np.full(frontier.size, day, dtype = 'int64'))
+        else:
+            print("the maximum number of iterations is reached")
+
+        cascade_nodes = np.concatenate(cascade_nodes)
+        infected[cascade_nodes] = False
+        nodes.append(cascade_nodes)
+        days.append(np.concatenate(cascade_days))
+        offsets.append(offsets[-1] + cascade_nodes.size)
+
+    return (np.asarray(offsets, dtype = 'int64'),
+            np.concatenate(nodes).astype(cl.NODE_DTYPE),
+            np.concatenate(days).astype(cl.DAY_DTYPE))
+
+# ---------------------------------------------- #
+#       Sparse Co-infection Accumulator          #
+# ---------------------------------------------- #
+def cascade_statistics(v_day):
+    """
+    Description
+    -----------
+    Counts, over a batch of cascades, how often each pair of vertices was
+    infected together and in which order. Only the pairs that actually
+    co-occur are stored, so memory and time scale with the number of
+    infected pairs instead of n^2.
+
+    Parameters
+    ----------
+    v_day: n x C integer numpy array
+        The infection day of each vertex in each cascade (NEVER if not infected), see cascade_batch()
+
+    Output
+    ------
+    H: n x n scipy sparse matrix
+        H[i, j] is the number of cascades in which both i and j were infected (zero diagonal)
+    F: n x n scipy sparse matrix
+        F[i, j] is the number of cascades in which both were infected and i was infected before j
+    J: n numpy array
+        J[i] is the number of cascades in which i was infected
+    """
+    node, c = np.nonzero(np.transpose(v_day != NEVER))[::-1]
+    t = v_day[node, c]
+
+    return infection_statistics(node, c, t, np.shape(v_day)[0], np.shape(v_day)[1])
+
+
+def infection_statistics(node, c, t, n, num_of_cascade):
+    """
+    Description
+    -----------
+    The accumulator behind cascade_statistics(), working directly on the
+    list of infections, e.g. as streamed from a cascade log.
+
+    Parameters
+    ----------
+    node, c, t: numpy arrays
+        Vertex node[x] was infected in cascade c[x] at time t[x]
+    n: The number of vertices
+    num_of_cascade: The number of cascades
+
+    Output
+    ------
+    H, F, J: See cascade_statistics()
+    """
+    H, J = coinfection_statistics(node, c, n, num_of_cascade)
+
+    # Sort the infections by (cascade, time); one row of E per (cascade, day)
+    order = np.lexsort((t, c))
+    node, c, t = node[order], c[order], t[order]
+    new_row = np.ones(node.size, dtype = 'bool')
+    new_row[1:] = (c[1:] != c[:-1]) | (t[1:] != t[:-1])
+    row = np.cumsum(new_row) - 1
+    num_rows = row[-1] + 1 if node.size else 0
+    E = sparse.csr_matrix((np.ones(node.size, dtype = 'int64'), (row, node)), shape = (num_rows, n))
+
+    # B holds, for each (cascade, day) row, the vertices infected strictly earlier in that cascade
+    cascade_start = np.flatnonzero(np.r_[True, c[1:] != c[:-1]]) if node.size else np.zeros(0, dtype = 'int64')
+    row_start = np.flatnonzero(new_row)
+    first = cascade_start[np.searchsorted(cascade_start, row_start, side = 'right') - 1]
+    length = row_start - first
+    b_row = np.repeat(np.arange(num_rows), length)
+    b_pos = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length) + np.repeat(first, length)
+    B = sparse.csr_matrix((np.ones(b_row.size, dtype = 'int64'), (b_row, node[b_pos])), shape = (num_rows, n))
+
+    # The ordered co-infection counts
+    F = sparse.csr_matrix(B.T @ E)
+
+    return H, F, J
+
+
+def coinfection_statistics(node, c, n, num_of_cascade, upper = False):
+    """
+    Description
+    -----------
+    The co-infection and infection counts H, J of infection_statistics()
+    alone, for the learners that do not need the ordered counts. With
+    upper, H only holds the pairs i < j, half of the symmetric counts.
+    """
+    # Dense batches share most of their pairs; their counts are popcounts of bitsets
+    if node.size > BITSET_DENSITY * n * num_of_cascade:
+        return bitset_coinfection(node, c, n, num_of_cascade, upper = upper)
+
+    # X^T X without the diagonal, X being the cascade-by-node incidence matrix
+    X = sparse.csr_matrix((np.ones(node.size, dtype = 'int64'), (c, node)), shape = (num_of_cascade, n))
+    H = sparse.csr_matrix(X.T @ X)
+    J = H.diagonal()
+    if upper:
+        return sparse.triu(H, k = 1, format = 'csr'), J
+    H.setdiag(0)
+    H.eliminate_zeros()
+    return H, J
+
+
+BITSET_DENSITY = 0.1 # The share of infected (vertex, cascade) entries above which bitset_coinfection() is used
+
+BITSET_BLOCK = 1 << 24 # The number of words ANDed at once by bitset_coinfection()
+
+
+POPCOUNT_TABLE = np.array([bin(byte).count("1") for byte in range(256)], dtype = 'uint8')
+
+
+def popcount(x):
+    """
+    The number of set bits of each element of a uint64 array: np.bitwise_count
+    on NumPy >= 2.0, a byte lookup table otherwise.
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    x = np.ascontiguousarray(x)
+    return POPCOUNT_TABLE[x.view('uint8')].reshape(x.shape + (8,)).sum(axis = -1, dtype = 'uint8')
+
+
+def pack_infections(node, c, n, num_of_cascade):
+    """
+    Description
+    -----------
+    Packs the infection history of each vertex into a bitset over the
+    cascades: bit c % 64 of word c // 64 of row i is set if vertex i was
+    infected in cascade c.
+
+    Output
+    ------
+    An n x ceil(num_of_cascade / 64) uint64 numpy array
+    """
+    words = (num_of_cascade + 63) // 64
+    infected = np.zeros((n, 64 * words), dtype = 'bool')
+    infected[node, c] = True
+    return np.packbits(infected, axis = 1, bitorder = 'little').view('<u8')
+
+
+def bitset_coinfection(node, c, n, num_of_cascade, block = BITSET_BLOCK, upper = False):
+    """
+    Description
+    -----------
+    The co-infection counts of infection_statistics() for dense batches,
+    where most pairs of infected vertices are infected together: every
+    count is the popcount of the AND of two bitsets (see pack_infections()),
+    64 cascades per word, computed for a block of rows at a time. With
+    upper, only the pairs i < j are counted, which halves the work.
+
+    Output
+    ------
+    H, J: The co-infection counts (zero diagonal, or upper triangle) and the infection counts, see cascade_statistics()
+    """
+    bits = pack_infections(node, c, n, num_of_cascade)
+    J = popcount(bits).sum(axis = 1, dtype = 'int64')
+
+    # Only the infected vertices can have co-infections
+    infected = np.flatnonzero(J)
+    bits = np.ascontiguousarray(bits[infected].T)
+    m = infected.size
+    rows = max(1, block // max(1, m))
+
+    row_nnz = np.zeros(n, dtype = 'int64')
+    indices, data = [np.zeros(0, dtype = 'int64')], [np.zeros(0, dtype = 'int64')]
+    for start in range(0, m, rows):
+        stop = min(m, start + rows)
+        first = start if upper else 0 # The first column of the block
+        counts = np.zeros((stop - start, m - first), dtype = 'int32')
+        for word in bits:
+            counts += popcount(word[start:stop, None] & word[None, first:])
+        if upper:
+            counts[np.tril_indices(stop - start, m = m - first)] = 0
+        else:
+            counts[np.arange(stop - start), np.arange(start, stop)] = 0
+
+        # The nonzero counts in row-major order are the CSR rows of the block
+        nonzero = counts != 0
+        row_nnz[infected[start:stop]] = nonzero.sum(axis = 1)
+        flat = np.flatnonzero(nonzero)
+        indices.append(infected[first + flat % (m - first)])
+        data.append(counts.ravel()[flat].astype('int64'))
+
+    indptr = np.r_[0, np.cumsum(row_nnz)]
+    H = sparse.csr_matrix((np.concatenate(data), np.concatenate(indices), indptr), shape = (n, n))
+    return H, J
+
+
+# ------------------------------------------------ #
+#       Parallel Cascades and Merged Statistics    #
+# ------------------------------------------------ #
+CASCADE_BLOCK = 64 # The number of cascades simulated per independent random stream; a multiple of 64, so the bitsets of bitset_coinfection() fill whole words
+
+SIMULATORS = ('batch', 'frontier') # run_cascades() and run_cascades_frontier()
+
+worker_graph = None # The graph held by each pool worker
+
+
+def init_worker(A):
+    """
+    Stores the graph once per pool worker instead of pickling it per task.
+    A may also be a graph store directory, which is mapped without a copy.
+    """
+    global worker_graph
+    if isinstance(A, str):
+        A = gs.open_store(A)
+    worker_graph = A
+
+
+def block_cascades(task):
+    """
+    Description
+    -----------
+    Runs one block of cascades on its own random stream with the chosen
+    simulator and returns them as (offsets, nodes, days) cascade log
+    columns, see cascade_log.encode().
+    """
+    p, k, num_of_cascade, seed_seq, simulator = task
+    rng = np.random.default_rng(seed_seq)
+    if simulator == 'frontier':
+        return run_cascades_frontier(worker_graph, p, k, num_of_cascade, rng)
+
+    v_day = run_cascades(worker_graph, p, k, num_of_cascade, rng)
+    return cl.encode(v_day)
+
+
+def block_statistics(task):
+    """
+    Description
+    -----------
+    Runs one block of cascades on its own random stream and returns the
+    block's partial statistics (H, F, J), see cascade_statistics(), with
+    the block's timings and per-cascade sizes / last days for profiling.
+    """
+    start = time.perf_counter()
+    offsets, nodes, days = block_cascades(task)
+    simulated = time.perf_counter()
+
+    node, c, t = cl.triplets(offsets, nodes, days)
+    H, F, J = infection_statistics(node, c, t, np.shape(worker_graph)[0], cl.num_of_cascades(offsets))
+    accumulated = time.perf_counter()
+
+    info = {"simulate_s": simulated - start,
+            "accumulate_s": accumulated - simulated,
+            "summary": cl.summarize(offsets, days)}
+    return H, F, J, info
+
+
+def block_coinfection(task):
+    """
+    Description
+    -----------
+    Runs one block of cascades like block_statistics(), but only counts
+    the co-infections: it returns the upper triangle of H and J, without
+    the ordered counts F, and the block's profiling info.
+    """
+    start = time.perf_counter()
+    offsets, nodes, days = block_cascades(task)
+    simulated = time.perf_counter()
+
+    node, c, _ = cl.triplets(offsets, nodes, days)
+    H, J = coinfection_statistics(node, c, np.shape(worker_graph)[0], cl.num_of_cascades(offsets), upper = True)
+    accumulated = time.perf_counter()
+
+    info = {"simulate_s": simulated - start,
+            "accumulate_s": accumulated - simulated,
+            "summary": cl.summarize(offsets, days)}
+    return H, J, info
+
+
+def run_blocks(A, p, k, num_of_cascade, num_workers, seed, block_function, simulator = 'batch'):
+    """
+    Description
+    -----------
+    Splits the cascades into fixed blocks of CASCADE_BLOCK, each with its
+    own random stream spawned from seed, and runs block_function on the
+    blocks on a process pool. The block layout does not depend on the
+    number of workers. At most one block more than there are workers is
+    submitted ahead of the caller, so the results held at any time stay
+    bounded however many cascades are run.
+
+    Output
+    ------
+    Yields the per-block results, in block order
+    """
+    if simulator not in SIMULATORS:
+        raise ValueError('Unknown simulator {}, please use one of {}'.format(simulator, SIMULATORS))
+
+    # One independent random stream per block of cascades
+    sizes = [CASCADE_BLOCK] * (num_of_cascade // CASCADE_BLOCK)
+    if num_of_cascade % CASCADE_BLOCK != 0:
+        sizes.append(num_of_cascade % CASCADE_BLOCK)
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = iter([(p, k, size, stream, simulator) for size, stream in zip(sizes, streams)])
+
+    if num_workers > 1:
+        return pool_blocks(A, num_workers, block_function, tasks)
+
+    init_worker(A)
+    return map(block_function, tasks)
+
+
+def pool_blocks(A, num_workers, block_function, tasks):
+    """
+    Runs block_function on the tasks on a process pool and yields the
+    results in task order, keeping only a window of tasks in flight.
+    """
+    # A memory-mapped graph is passed by its store directory, so the workers share its pages
+    graph = gs.source_directory(A) or A
+    with multiprocessing.Pool(num_workers, initializer = init_worker, initargs = (graph,)) as pool:
+        pending = collections.deque(pool.apply_async(block_function, (task,)) for task in itertools.islice(tasks, num_workers + 1))
+        while pending:
+            result = pending.popleft().get()
+            for task in itertools.islice(tasks, 1):
+                pending.append(pool.apply_async(block_function, (task,)))
+            yield result
+
+
+def merge_counts(partial, totals):
+    """
+    Adds each batch of partial counts to the running totals, consuming the
+    batches one at a time.
+    """
+    totals = list(totals)
+    for counts in partial:
+        totals = [total + count for total, count in zip(totals, counts)]
+    return tuple(totals)
+
+
+def merge_statistics(partial, n):
+    """
+    Sums the partial (H, F, J) counts of several batches of cascades, see merge_counts().
+    """
+    return merge_counts(partial, (sparse.csr_matrix((n, n), dtype = 'int64'),
+                                  sparse.csr_matrix((n, n), dtype = 'int64'),
+                                  np.zeros(n, dtype = 'int64')))
+
+
+def merge_coinfection(partial, n):
+    """
+    Sums the partial (H, J) counts of several batches of cascades, see merge_counts().
+    """
+    return merge_counts(partial, (sparse.csr_matrix((n, n), dtype = 'int64'), np.zeros(n, dtype = 'int64')))
+
+
+def record_blocks(partial, profiler, k):
+    """
+    Records the timings and cascades of each block result in profiler (if
+    any) as the results stream past, and yields the counts without the info.
+    """
+    for result in partial:
+        info = result[-1]
+        if profiler is not None:
+            profiler.add_phase("simulate", info["simulate_s"])
+            profiler.add_phase("accumulate", info["accumulate_s"])
+            profiler.record_cascades(*info["summary"], k)
+        yield result[:-1]
+
+
+def simulate_statistics(A, p, k, num_of_cascade, num_workers = 1, seed = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    Runs num_of_cascade cascades and returns their merged statistics. The
+    cascades are split into fixed blocks of CASCADE_BLOCK, each with its
+    own random stream spawned from seed, and the blocks are spread over a
+    process pool. The partial counts of each block are added to running
+    totals as soon as it finishes, so memory does not grow with the number
+    of blocks, and the result for a given seed is the same for any number
+    of workers.
+
+    Parameters
+    ----------
+    A: The adjacency matrix of the graph
+    p: The default transmission probability (None: per-edge, from the data of A)
+    k: The maximum number of days (iterations) for each cascade
+    num_of_cascade: The number of cascades to run
+    num_workers: The number of worker processes (1 runs in this process)
+    seed: The seed of the random streams (None draws fresh entropy)
+    simulator: 'batch' (run_cascades) or 'frontier' (run_cascades_frontier)
+    profiler: A profiling.Profiler to record the phases and cascades in (optional)
+
+    Output
+    ------
+    H, F, J: The merged co-infection, ordered co-infection and infection counts
+    """
+    # The blocks are merged as they arrive, so the merge is part of this phase
+    with maybe_phase(profiler, "cascades"):
+        partial = run_blocks(A, p, k, num_of_cascade, num_workers, seed, block_statistics, simulator)
+        return merge_statistics(record_blocks(partial, profiler, k), np.shape(A)[0])
+
+
+def simulate_coinfection(A, p, k, num_of_cascade, num_workers = 1, seed = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    Runs the cascades of simulate_statistics() (same blocks and random
+    streams) but only merges the co-infection and infection counts, for
+    the structure learners that never read the ordered counts.
+
+    Output
+    ------
+    H: The upper triangle (i < j) of the merged co-infection counts
+    J: The merged infection counts
+    """
+    with maybe_phase(profiler, "cascades"):
+        partial = run_blocks(A, p, k, num_of_cascade, num_workers, seed, block_coinfection, simulator)
+        return merge_coinfection(record_blocks(partial, profiler, k), np.shape(A)[0])
+
+
+def simulate_cascade_log(path, A, p, k, num_of_cascade, num_workers = 1, seed = None, simulator = 'batch'):
+    """
+    Description
+    -----------
+    Runs num_of_cascade cascades exactly as simulate_statistics() does and
+    writes them to a cascade log (see algorithm/cascade_log.py) instead of
+    consuming them, so the learners can be re-run on the same cascades.
+
+    Parameters
+    ----------
+    path: The output .npz file
+    A: The adjacency matrix of the graph
+    p: The default transmission probability (None: per-edge, from the data of A)
+    k: The maximum number of days (iterations) for each cascade
+    num_of_cascade: The number of cascades to run
+    num_workers: The number of worker processes (1 runs in this process)
+    seed: The seed of the random streams (None draws fresh entropy)
+    simulator: 'batch' (run_cascades) or 'frontier' (run_cascades_frontier)
+    """
+    offsets, nodes, days = cl.concatenate(run_blocks(A, p, k, num_of_cascade, num_workers, seed, block_cascades, simulator))
+    cl.save_cascade_log(path, np.shape(A)[0], offsets, nodes, days, p = p, k = k, seed = seed)
+
+
+def log_statistics(path, num_of_cascade = None, batch_size = 100):
+    """
+    Description
+    -----------
+    Reads a cascade log and merges the statistics of its first
+    num_of_cascade cascades batch by batch, see simulate_statistics().
+    """
+    n, offsets, nodes, days = cl.load_cascade_log(path)
+    partial = (infection_statistics(node, c, t, n, size) for node, c, t, size in cl.iter_batches(offsets, nodes, days, num_of_cascade, batch_size))
+    return merge_statistics(partial, n)
+
+
+def log_coinfection(path, num_of_cascade = None, batch_size = 100):
+    """
+    Description
+    -----------
+    Reads a cascade log and merges the counts of its first num_of_cascade
+    cascades batch by batch, see simulate_coinfection().
+    """
+    n, offsets, nodes, days = cl.load_cascade_log(path)
+    partial = (coinfection_statistics(node, c, n, size, upper = True) for node, c, _, size in cl.iter_batches(offsets, nodes, days, num_of_cascade, batch_size))
+    return merge_coinfection(partial, n)
+
+
+def collect_statistics(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    The statistics (H, F, J) the learners start from: read from cascade_log
+    when one is given, simulated otherwise.
+    """
+    if cascade_log is None:
+        return simulate_statistics(A, p, k, num_of_cascade, num_workers, seed, simulator, profiler)
+
+    with maybe_phase(profiler, "read_log"):
+        H, F, J = log_statistics(cascade_log, num_of_cascade)
+    if np.shape(H)[0] != np.shape(A)[0]:
+        raise ValueError('The cascade log was recorded on a graph with {} vertices, not {}'.format(np.shape(H)[0], np.shape(A)[0]))
+    return H, F, J
+
+
+def collect_coinfection(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    The counts (H, J) of collect_statistics() without the ordered counts,
+    H holding the upper triangle only: read from cascade_log when one is
+    given, simulated otherwise.
+    """
+    if cascade_log is None:
+        return simulate_coinfection(A, p, k, num_of_cascade, num_workers, seed, simulator, profiler)
+
+    with maybe_phase(profiler, "read_log"):
+        H, J = log_coinfection(cascade_log, num_of_cascade)
+    if np.shape(H)[0] != np.shape(A)[0]:
+        raise ValueError('The cascade log was recorded on a graph with {} vertices, not {}'.format(np.shape(H)[0], np.shape(A)[0]))
+    return H, J
+
+CANDIDATES = ('exact', 'lsh') # collect_coinfection() and lsh_statistics()
+
+
+def collect_infections(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    The cascades themselves, as one (node, cascade) pair per infection:
+    read from cascade_log when one is given, simulated otherwise (with
+    the same random streams as simulate_statistics()).
+    """
+    if cascade_log is None:
+        with maybe_phase(profiler, "cascades"):
+            offsets, nodes, days = cl.concatenate(run_blocks(A, p, k, num_of_cascade, num_workers, seed, block_cascades, simulator))
+        if profiler is not None:
+            profiler.record_cascades(*cl.summarize(offsets, days), k)
+    else:
+        with maybe_phase(profiler, "read_log"):
+            n, offsets, nodes, days = cl.load_cascade_log(cascade_log)
+        if n != np.shape(A)[0]:
+            raise ValueError('The cascade log was recorded on a graph with {} vertices, not {}'.format(n, np.shape(A)[0]))
+        if num_of_cascade > cl.num_of_cascades(offsets):
+            raise ValueError('The cascade log holds {} cascades, not {}'.format(cl.num_of_cascades(offsets), num_of_cascade))
+        offsets = offsets[:num_of_cascade + 1]
+        nodes, days = nodes[:offsets[-1]], days[:offsets[-1]]
+
+    node, c, _ = cl.triplets(offsets, nodes, days)
+    return node, c
+
+
+def lsh_statistics(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
+    """
+    Description
+    -----------
+    The co-infection counts H of collect_coinfection(), restricted to the
+    candidate pairs proposed by MinHash / LSH (see algorithm/lsh.py), for
+    graphs where counting every co-infected pair does not fit in memory.
+    The candidates' counts are exact; the other pairs are left out.
+    """
+    n = np.shape(A)[0]
+    node, c = collect_infections(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler)
+
+    with maybe_phase(profiler, "candidates"):
+        signatures = al.minhash_signatures(node, c, n, al.NUM_BANDS * al.BAND_ROWS)
+        u, v = al.lsh_candidates(signatures)
+
+    with maybe_phase(profiler, "accumulate"):
+        return al.candidate_coinfection(node, c, n, num_of_cascade, u, v)
+
+
+def coinfection_counts(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None, candidates = 'exact'):
+    """
+    The co-infection counts H the structure learners select from, over all
+    pairs ('exact') or over the LSH candidates only ('lsh'). Only the upper
+    triangle (i < j) of H is returned.
+    """
+    if candidates not in CANDIDATES:
+        raise ValueError('Unknown candidates {}, please use one of {}'.format(candidates, CANDIDATES))
+    if candidates == 'lsh':
+        return lsh_statistics(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler)
+
+    H, _ = collect_coinfection(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler)
+    return H
+
+# ------------------------------------- #
+#       Top-k Candidate Selection       #
+# ------------------------------------- #
+def iter_top_pairs(M, batch = 1024):
+    """
+    Description
+    -----------
+    Lazily yields the nonzero entries of a sparse score matrix in
+    descending order of score. Each round takes the next batch with
+    np.argpartition and sorts only that batch, doubling the batch size
+    every round, so a consumer that stops after the first few thousand
+    candidates never pays for sorting all of them.
+
+    Parameters
+    ----------
+    M: n x n scipy sparse matrix
+        The score of each candidate pair (only nonzero entries are candidates)
+    batch: integer > 0
+        The size of the first batch
+
+    Output
+    ------
+    Yields (u, v, score) tuples, highest score first
+    """
+    M = sparse.coo_matrix(M)
+    rows, cols, scores = M.row, M.col, M.data
+
+    remaining = np.arange(scores.size)
+    while remaining.size != 0:
+        b = min(batch, remaining.size)
+        if b < remaining.size:
+            part = np.argpartition(-scores[remaining], b - 1)
+            top, remaining = remaining[part[:b]], remaining[part[b:]]
+        else:
+            top, remaining = remaining, remaining[:0]
+
+        # Sort only the current batch
+        top = top[np.argsort(-scores[top], kind = 'stable')]
+        for u, v, s in zip(rows[top].tolist(), cols[top].tolist(), scores[top].tolist()):
+            yield u, v, s
+
+        batch *= 2
+
+# ------------------------------------------------ #
+#       Maximum Spanning Tree (Kruskal)            #
+# ------------------------------------------------ #
+def find_root(parent, u):
+    """
+    Returns the root of u in the union-find forest, halving the path on the way.
+    """
+    while parent[u] != u:
+        parent[u] = parent[parent[u]]
+        u = parent[u]
+    return u
+
+
+def maximum_spanning_tree(M, n):
+    """
+    Description
+    -----------
+    Kruskal's algorithm on the sparse scored candidate pairs: the pairs are
+    taken in descending order of score (see iter_top_pairs()) and a pair is
+    kept when it joins two different components of a union-find forest.
+    Stops as soon as n - 1 edges are kept, so the cost is at most
+    O(m log m) for m candidates.
+
+    Parameters
+    ----------
+    M: n x n scipy sparse matrix
+        The score of each candidate pair (only nonzero entries are candidates)
+    n: integer > 0
+        The number of vertices
+
+    Output
+    ------
+    edges: list of (u, v)
+        The edges of a maximum-weight spanning forest of the candidates
+    """
+    parent = list(range(n))
+    size = [1] * n
+    edges = []
+    for u, v, value in iter_top_pairs(M, batch = n):
+        if len(edges) == n - 1:
+            break
+
+        root_u = find_root(parent, u)
+        root_v = find_root(parent, v)
+        if root_u == root_v: # Avoid forming cycles
+            continue
+
+        # Union by size
+        if size[root_u] < size[root_v]:
+            root_u, root_v = root_v, root_u
+        parent[root_v] = root_u
+        size[root_u] += size[root_v]
+        edges.append((u, v))
+
+    return edges
+
 # ------------------------------------------------------ #
 #       Learn the structure of bidirectional tree        #
 # ------------------------------------------------------ #
-def learn_tree_structure(A, p, k, num_of_cascade):
+def learn_tree_structure(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None, candidates = 'exact'):
     """
     Description
     -----------
@@ -108,9 +1026,15 @@ def learn_tree_structure(A, p, k, num_of_cascade):
     Parameters
     ----------
     A: The adjacency matrix of the graph
-    p: The default transmission probability
+    p: The default transmission probability (None: per-edge, from the data of A)
     k: The maximum number of days (iterations) for each cascade
     num_of_cascades: The number of cascades to run
+    num_workers: The number of worker processes for the cascades
+    seed: The seed of the cascades; results are reproducible for a given seed
+    cascade_log: A cascade log to read the cascades from instead of simulating them
+    simulator: 'batch' or 'frontier' (event-driven, for large graphs with small p)
+    profiler: A profiling.Profiler to record the phases and cascades in (optional)
+    candidates: 'exact' (score every co-infected pair) or 'lsh' (score only the MinHash / LSH candidates)
 
     Output
     -------
@@ -118,65 +1042,67 @@ def learn_tree_structure(A, p, k, num_of_cascade):
     """
 
     n = np.shape(A)[0]
-    H = {} # As suggested in the paper, this is the fraction of cascades for which both i and j were infected
-    
-    # Initilize all to 0
-    for i in range(n):
-        for j in range(n):
-            H[(i, j)] = 0
-    
-    # Run MANY cascades
-    for _ in range(num_of_cascade):
-        infected = random.randint(0, n-1) # Initially only one infected vertex
-        v_state = np.zeros((n, 1), dtype = 'float') # Initially only one infected vertex
-        v_state[infected, 0] = 1 
-        v_time = v_state # The infection time is 1
-
-        v_state, v_time = cascade(A, v_time, v_state, p, k) # run the cascade
-       
-        for i in range(n - 1):
-            for j in range(i + 1, n):
-                if v_state[i] == v_state[j] == 1:
-                    H[(i, j)] += 1
-    
-    # Sort H in descending order
-    sorted_H = dict(sorted(H.items(), key=lambda item: item[1],  reverse = True))
-    
-    # Avoid forming cycles
-    selected = [0] * n
-    edges = []
-    total = 0
-    for key, value in sorted_H.items():
-        if total != n:
-            u = key[0]
-            v = key[1]
-            if (selected[u] == 0) or (selected[v] == 0):
-                edges.append((u, v))
-                selected[u] = 1
-                selected[v] = 1
-            total += 1
-        else:
-            break
-    
-    offset = 2 # This is needed to correctly compute EC
-    # Compute EC
-    num_of_correct_edges = 0
-    A_dense = sparse.csr_matrix.todense(A)
-    for e in edges:
-        u = e[0]
-        v = e[1]
-        if A[u, v] == 1:
-            num_of_correct_edges += 1
-
-    EC = float(offset * num_of_correct_edges / (n-1))
+
+    # Run MANY cascades; as suggested in the paper, H counts the cascades for which both i and j were infected
+    H = coinfection_counts(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler, candidates)
+
+    # The tree is the maximum spanning tree of the co-infection scores
+    with maybe_phase(profiler, "select"):
+        edges = maximum_spanning_tree(sparse.triu(H, k = 1), n)
+
+    # Compute EC against the n - 1 edges of A
+    with maybe_phase(profiler, "evaluate"):
+        EC = ae.edge_correctness(A, edges)
 
     return EC
 
 
+# ---------------------------------------------------- #
+#       Weight estimator of bidirectional tree         #
+# ---------------------------------------------------- #
+def estimate_tree_weight(F, J, num_of_cascade):
+    """
+    Description
+    -----------
+    The weight estimator of learn_tree_weight(). With H = F / num_of_cascade,
+    the estimate is (H_ij - H_ji) / 2 divided by J_i * 0.025 + (H_ij - H_ji) / 2.
+    It is nonzero only where the ordered counts differ, so it is evaluated
+    on those pairs alone and returned as a sparse matrix.
+
+    Parameters
+    ----------
+    F: n x n scipy sparse matrix
+        The ordered co-infection counts (i infected before j)
+    J: n numpy array
+        The number of cascades in which i was infected
+    num_of_cascade: The number of cascades
+
+    Output
+    ------
+    predicted_p: n x n scipy sparse matrix
+        The predicted weight of each pair
+    """
+    n = np.shape(F)[0]
+
+    # The fraction of cascades for which i and j both infection, and i reported before j
+    H = sparse.csr_matrix(F, dtype = 'float') / num_of_cascade
+    J = np.asarray(J, dtype = 'float') / num_of_cascade # The fraction of infection for which i got infected
+
+    # 0.5 * (H_ij - H_ji) on the supported pairs only
+    D = sparse.coo_matrix(0.5 * (H - H.T))
+    D.eliminate_zeros()
+
+    denominator = J[D.row] * (0.025) + D.data
+    keep = denominator != 0
+    predicted = D.data[keep] / denominator[keep]
+
+    return sparse.csr_matrix((predicted, (D.row[keep], D.col[keep])), shape = (n, n))
+
+
 # ---------------------------------------------------- #
 #       Learn the weights of bidirectional tree        #
 # ---------------------------------------------------- #
-def learn_tree_weight(A, p, k, num_of_cascade):
+def learn_tree_weight(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
     """
     Description
     -----------
@@ -185,62 +1111,29 @@ def learn_tree_weight(A, p, k, num_of_cascade):
     Parameters
     ----------
     A: The adjacency matrix of the graph
-    p: The default transmission probability
+    p: The default transmission probability (None: per-edge, from the data of A)
     k: The maximum number of days (iterations) for each cascade
     num_of_cascades: The number of cascades to run
+    num_workers: The number of worker processes for the cascades
+    seed: The seed of the cascades; results are reproducible for a given seed
+    cascade_log: A cascade log to read the cascades from instead of simulating them
+    simulator: 'batch' or 'frontier' (event-driven, for large graphs with small p)
+    profiler: A profiling.Profiler to record the phases and cascades in (optional)
 
     Output
     ------
     The algorithm returns the mean absolute error
     """
-    n = np.shape(A)[0]
-    H = {} # The fraction of cascades for which i and j both infection, and i reported before j
-    J = [0] * n # The fraction of infection for which i got infected  
+    # Run MANY cascades
+    _, F, J = collect_statistics(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler)
 
-    # Initilize all to 0
-    for i in range(n):
-        for j in range(n):
-            H[(i, j)] = 0
+    # The predicted weight, as a sparse matrix
+    with maybe_phase(profiler, "estimate"):
+        predicted_p = estimate_tree_weight(F, J, num_of_cascade)
 
-    # Run MANY cascades
-    for _ in range(num_of_cascade):
-        infected = random.randint(0, n-1) # Initially only one infected vertex
-        v_state = np.zeros((n, 1), dtype = 'float') # Initially only one infected vertex
-        v_state[infected, 0] = 1
-        v_time = v_state
-
-        v_state, v_time = cascade(A, v_time, v_state, p, k) # run the cascade
-        
-        for i in range(n):
-            if v_state[i] == 1:
-                J[i] += float(1 / num_of_cascade)
-
-        for i in range(n - 1):
-            for j in range(i + 1, n):
-                if (v_state[i] == v_state[j] == 1) and (v_time[i] < v_time[j]):
-                    H[(i, j)] += float(1 / num_of_cascade)
-                elif (v_state[i] == v_state[j] == 1) and (v_time[i] > v_time[j]):
-                    H[(j, i)] += float(1 / num_of_cascade)
-   
-    # The predicted weight
-    predicted_p = np.zeros((n, n))
-
-    for i in range(n):
-        for j in range(n):
-            if (J[i] * (0.025) + H[(i, j)] * 0.5 - H[(j, i)] * 0.5) != 0:
-                predicted_p[i, j] = float((H[(i, j)] * 0.5 - H[(j, i)] * 0.5) / (J[i] * (0.025) + H[(i, j)] * 0.5 - H[(j, i)] * 0.5))
-   
-
-    A_dense = sparse.csr_matrix.todense(A)
-
-    sum = 0
-    # Compute the mean absolute error
-    for i in range(n-1):
-        for j in range(i + 1, n):
-            if A_dense[i, j] == 1:
-                sum += abs(float(predicted_p[i, j] - p))
-            
-    mae = float(sum / (n - 1))
+    # Compute the mean absolute error over the n - 1 edges of A
+    with maybe_phase(profiler, "evaluate"):
+        mae = ae.mean_absolute_error(A, predicted_p, p)
 
     return mae
 
@@ -248,7 +1141,60 @@ def learn_tree_weight(A, p, k, num_of_cascade):
 # ----------------------------------------------------------------- #
 #           Learn the structure of the degree bounded graph         #
 # ----------------------------------------------------------------- #
-def learn_degree_bounded_structure(A, p, k, max_d, num_of_cascade):
+def select_degree_bounded_edges(H, max_d, batch = 1024):
+    """
+    Description
+    -----------
+    Selects the edges of a degree-bounded graph from the co-infection
+    counts H by greedy b-matching: the pairs are sorted once in descending
+    order of H and each is kept while both of its endpoints are below the
+    maximum degree. The pairs are scanned in batches of doubling size; the
+    pairs of a batch that touch an already saturated vertex are dropped
+    with one vectorized test, and the scan stops once no two vertices can
+    be joined anymore.
+
+    Parameters
+    ----------
+    H: n x n scipy sparse matrix
+        The co-infection counts
+    max_d: The maximum degree of the graph
+    batch: The size of the first batch of pairs
+
+    Output
+    ------
+    edges: list of (u, v)
+    """
+    n = np.shape(H)[0]
+    M = sparse.triu(H, k = 1, format = 'csr').tocoo()
+
+    # Sort the pairs once, in descending order of H (ties in row-major order)
+    order = np.argsort(-M.data, kind = 'stable')
+    rows, cols = M.row[order], M.col[order]
+
+    # Avoid adding too many edges which violates the maximum degree
+    degree = np.zeros(n, dtype = 'int64')
+    unsaturated = n if max_d > 0 else 0
+    edges = []
+    start = 0
+    while start < rows.size and unsaturated > 1:
+        stop = min(rows.size, start + batch)
+        u, v = rows[start:stop], cols[start:stop]
+        open_pair = (degree[u] < max_d) & (degree[v] < max_d)
+
+        for u, v in zip(u[open_pair].tolist(), v[open_pair].tolist()):
+            if degree[u] < max_d and degree[v] < max_d:
+                edges.append((u, v))
+                degree[u] += 1
+                degree[v] += 1
+                unsaturated -= int(degree[u] == max_d) + int(degree[v] == max_d)
+
+        start = stop
+        batch *= 2
+
+    return edges
+
+
+def learn_degree_bounded_structure(A, p, k, max_d, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None, candidates = 'exact'):
     """
     Description
     -----------
@@ -257,69 +1203,95 @@ def learn_degree_bounded_structure(A, p, k, max_d, num_of_cascade):
     Parameters
     ----------
     A: The adjacency matrix of the graph
-    p: The default transmission probability
+    p: The default transmission probability (None: per-edge, from the data of A)
     k: The maximum number of days (iterations) for each cascade
     max_d: The maximum degree of the graph
     num_of_cascades: The number of cascades to run
+    num_workers: The number of worker processes for the cascades
+    seed: The seed of the cascades; results are reproducible for a given seed
+    cascade_log: A cascade log to read the cascades from instead of simulating them
+    simulator: 'batch' or 'frontier' (event-driven, for large graphs with small p)
+    profiler: A profiling.Profiler to record the phases and cascades in (optional)
+    candidates: 'exact' (score every co-infected pair) or 'lsh' (score only the MinHash / LSH candidates)
 
     Output
     -------
     The algorithm returns the edge correctness
     """
-    n = np.shape(A)[0]
-    H = {} 
+    # Run MANY cascades; H counts the cascades for which both i and j were infected
+    H = coinfection_counts(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler, candidates)
+    with maybe_phase(profiler, "select"):
+        edges = select_degree_bounded_edges(H, max_d)
 
-    # Initilize all to 0
-    for i in range(n):
-        for j in range(n):
-            H[(i, j)] = 0
+    # Compute EC against the edges of A
+    with maybe_phase(profiler, "evaluate"):
+        EC = ae.edge_correctness(A, edges)
 
-    # Run MANY cascades
-    for _ in range(num_of_cascade):
-        infected = random.randint(0, n-1) # Initially only one infected vertex
-        v_state = np.zeros((n, 1), dtype = 'float') # Initially only one infected vertex
-        v_state[infected, 0] = 1
-        v_time = v_state
+    return EC
 
-        v_state, v_time = cascade(A, v_time, v_state, p, k) # run the cascade
+# ------------------------------------------------------------ #
+#        Weight estimator of the degree bounded graph          #
+# ------------------------------------------------------------ #
+def estimate_degree_bounded_weight(co_infected, ordered, J, num_of_cascade):
+    """
+    Description
+    -----------
+    The closed-form estimator of learn_degree_bounded_weight(). With
+    F = co_infected / nc, H_ij the fraction of cascades in which i was
+    infected after j and J the infection fractions:
 
-        for i in range(n - 1):
-            for j in range(i + 1, n):
-                if v_state[i] == v_state[j] == 1:
-                    H[(i, j)] += 1
+        V_ij = F_ij^2 / (H_ij^2 + n J_i J_j)
+        delta = 0.025 - (V_ij - V_ji)^2
+        p_ij = (V_ji - V_ij) / (0.025 + sqrt(delta))
 
-        # Sort H in descending order
-        sorted_H = dict(sorted(H.items(), key=lambda item: item[1],  reverse = True))
+    p_ij is zero unless F_ij is, so the formula is evaluated in a few
+    vectorized passes over the co-infected pairs only.
 
-    # Avoid adding too many edges which violates the maximum degree
-    degree = [0] * n
-    edges = []
-    for key, value in sorted_H.items():
-        u = key[0]
-        v = key[1]
-        if (degree[v] < max_d) and (degree[v] < max_d):
-            edges.append((u, v))
-            degree[u] += 1
-            degree[v] += 1
-    
-    # Compute EC
-    offset = 2
-    num_of_correct_edges = 0
-    A_dense = sparse.csr_matrix.todense(A)
-    for e in edges:
-        u = e[0]
-        v = e[1]
-        if A[u, v] == 1:
-            num_of_correct_edges += 1
+    Parameters
+    ----------
+    co_infected: n x n scipy sparse matrix
+        The co-infection counts
+    ordered: n x n scipy sparse matrix
+        The ordered co-infection counts (i infected before j)
+    J: n numpy array
+        The number of cascades in which i was infected
+    num_of_cascade: The number of cascades
+
+    Output
+    ------
+    predicted_p: n x n scipy sparse matrix
+        The predicted weight of each pair
+    """
+    n = np.shape(co_infected)[0]
+    nc = num_of_cascade
 
-    EC = float(offset * num_of_correct_edges /(10 * (n-1))) # the average degree is 10
+    # The supported pairs and their fractions, defined in the paper
+    co_infected = sparse.coo_matrix(co_infected)
+    if co_infected.nnz == 0:
+        # No pair was co-infected; indexing ordered with empty arrays would return a matrix
+        return sparse.csr_matrix((n, n))
+    rows, cols = co_infected.row, co_infected.col
+    F_ij = co_infected.data / nc
+    ordered = sparse.csr_matrix(ordered)
+    H_ij = np.asarray(ordered[cols, rows]).ravel() / nc # i infected after j
+    H_ji = np.asarray(ordered[rows, cols]).ravel() / nc # j infected after i
+    J = np.asarray(J, dtype = 'float') / nc # The fraction of infection for which i got infected
+    JJ = n * J[rows] * J[cols]
 
-    return EC
+    # Both i and j were infected at least once, so the denominators are positive
+    V_ij = F_ij ** 2 / (H_ij ** 2 + JJ)
+    V_ji = F_ij ** 2 / (H_ji ** 2 + JJ)
+
+    # A negative delta would make the square root undefined; clip it at zero
+    delta = 0.025 - 4 * (V_ij * 0.5 - V_ji * 0.5) * 0.5 * (V_ij - V_ji)
+    predicted = (V_ji - V_ij) / (0.025 + np.sqrt(np.maximum(delta, 0.0)))
+
+    return sparse.csr_matrix((predicted, (rows, cols)), shape = (n, n))
 
 # ------------------------------------------------------------ #
 #        Learn the weights of the degree bounded graph         #
 # ------------------------------------------------------------ #
-def learn_degree_bounded_weight(A, p, k, num_of_cascade):
+def learn_degree_bounded_weight(A, p, k, num_of_cascade, num_workers = 1, seed = None, cascade_log = None, simulator = 'batch', profiler = None):
     """
     Description
     -----------
@@ -328,72 +1300,44 @@ def learn_degree_bounded_weight(A, p, k, num_of_cascade):
     Parameters
     -----------
     A: The adjacency matrix of the graph
-    p: The default transmission probability
+    p: The default transmission probability (None: per-edge, from the data of A)
     k: The maximum number of days (iterations) for each cascade
     num_of_cascades: The number of cascades to run
+    num_workers: The number of worker processes for the cascades
+    seed: The seed of the cascades; results are reproducible for a given seed
+    cascade_log: A cascade log to read the cascades from instead of simulating them
+    simulator: 'batch' or 'frontier' (event-driven, for large graphs with small p)
+    profiler: A profiling.Profiler to record the phases and cascades in (optional)
 
     Output
     -------
     The algorithm returns mean absolte errors
     """
-    n = np.shape(A)[0]
     nc = num_of_cascade
-    F = {} # Defined in the paper
-    H = {} # Defined in the paper
-    J = [0] * n # The fraction of infection for which i got infected
-
-    # Initilize all to 0
-    for i in range(n):
-        for j in range(n):
-            F[(i, j)] = 0
-            H[(i, j)] = 0
 
     # Run MANY cascades
-    for _ in range(num_of_cascade):
-        infected = random.randint(0, n-1) # Initially only one infected vertex
-        v_state = np.zeros((n, 1), dtype = 'float') # Initially only one infected vertex
-        v_state[infected, 0] = 1
-        v_time = v_state
-
-        v_state, v_time = cascade(A, v_time, v_state, p, k) # run the cascade
-
-        for i in range(n):
-            if v_state[i] == 1:
-                J[i] += float(1 / num_of_cascade)
-
-        for i in range(n - 1):
-            for j in range(i + 1, n):
-                if v_state[i] == v_state[j] == 1:
-                    F[(i, j)] += float(1 / num_of_cascade)
-                    F[(j, i)] += float(1 / num_of_cascade)
-                    if v_time[i] > v_time[j]:
-                        H[(i, j)] += float(1 / num_of_cascade)
-                    elif v_time[i] > v_time[j]:
-                        H[(j, i)] += float(1 / num_of_cascade)
-    
-    predicted_p = np.zeros((n, n))
-    
-    # Defined in the paper
-    for i in range(n):
-        for j in range(n):
-            V_ij = V_ji = 0
-            if (H[(i, j)] ** 2 + n * J[i] * J[j]) != 0:
-                V_ij = (F[(i, j)] ** 2) / (H[(i, j)] ** 2 + n * J[i] * J[j])
-            if (H[(j, i)] ** 2 + n * J[i] * J[j]) != 0:
-                V_ji = (F[(j, i)] ** 2) / (H[(j, i)] ** 2 + n * J[i] * J[j])
-
-            delta = 0.025 - 4 * (V_ij * 0.5 - V_ji * 0.5) * 0.5 *  (V_ij - V_ji)
-            if (0.025 + math.sqrt(delta)) != 0:
-                predicted_p[i, j] = float((V_ji - V_ij) / (0.025 + math.sqrt(delta)))
-
-    A_dense = sparse.csr_matrix.todense(A)
-    sum = 0
+    co_infected, ordered, J = collect_statistics(A, p, k, num_of_cascade, num_workers, seed, cascade_log, simulator, profiler)
+
+    # The predicted weight, as a sparse matrix
+    with maybe_phase(profiler, "estimate"):
+        predicted_p = estimate_degree_bounded_weight(co_infected, ordered, J, nc)
+
+    # Compute the mean absolute error over the edges of A
+    with maybe_phase(profiler, "evaluate"):
+        mae = degree_bounded_error(A, predicted_p, p, nc)
+    return mae
+
+
+def degree_bounded_error(A, predicted_p, p, num_of_cascade):
+    """
+    Description
+    -----------
+    The error reported by learn_degree_bounded_weight(): the absolute error
+    summed over the edges of A, scaled by 2 / (n log(num_of_cascade)).
+    """
+    n = np.shape(A)[0]
+    sum = ae.absolute_error(A, predicted_p, p)
     offset = 2
-    # Compute the mean absolute error
-    for i in range(n-1):
-        for j in range(i + 1, n):
-            if A_dense[i, j] == 1:
-                sum += abs(float(predicted_p[i, j] - p))
 
-    mae = float(offset * sum / (n * math.log(nc))) # this needs to be changed
+    mae = float(offset * sum / (n * math.log(num_of_cascade))) # this needs to be changed
     return mae
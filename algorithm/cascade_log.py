@@ -0,0 +1,165 @@
+import numpy as np
+
+# ------------------------------------------------------------------ #
+#       Compressed cascade log: CSR-style offsets, nodes and days    #
+# ------------------------------------------------------------------ #
+# Cascade c infected the vertices nodes[offsets[c]:offsets[c+1]] on the
+# days days[offsets[c]:offsets[c+1]]. The vertices are stored as int32 and
+# the days as int16, so a cascade costs 6 bytes per infected vertex before
+# the compression of the .npz file. A log is read into memory whole when
+# it is loaded (a compressed .npz cannot be memory-mapped); iter_batches()
+# then hands it to the accumulators a batch of cascades at a time.
+
+NODE_DTYPE = 'int32'
+DAY_DTYPE = 'int16'
+
+
+def encode(v_day):
+    """
+    Description
+    -----------
+    Converts the n x C infection days of a batch of cascades (see
+    algo.cascade_batch(), negative for vertices that were never infected)
+    into the compact (offsets, nodes, days) columns of the log.
+
+    Parameters
+    ----------
+    v_day: n x C integer numpy array
+        The infection day of each vertex in each cascade
+
+    Output
+    ------
+    offsets: C + 1 numpy int64 array
+    nodes: numpy int32 array
+    days: numpy int16 array
+    """
+    # Column-major nonzeros, so the infections of each cascade are contiguous
+    c, node = np.nonzero(np.transpose(v_day) >= 0)
+    day = v_day[node, c]
+    if day.size != 0 and day.max() > np.iinfo(DAY_DTYPE).max:
+        raise ValueError('The infection days do not fit in ' + DAY_DTYPE)
+
+    counts = np.bincount(c, minlength = np.shape(v_day)[1])
+    offsets = np.zeros(counts.size + 1, dtype = 'int64')
+    np.cumsum(counts, out = offsets[1:])
+
+    return offsets, node.astype(NODE_DTYPE), day.astype(DAY_DTYPE)
+
+
+def concatenate(parts):
+    """
+    Description
+    -----------
+    Joins the (offsets, nodes, days) columns of several batches, in order.
+    """
+    offsets = [np.zeros(1, dtype = 'int64')]
+    nodes = []
+    days = []
+    total = 0
+    for part_offsets, part_nodes, part_days in parts:
+        offsets.append(part_offsets[1:] + total)
+        nodes.append(part_nodes)
+        days.append(part_days)
+        total += part_offsets[-1]
+
+    return (np.concatenate(offsets),
+            np.concatenate(nodes).astype(NODE_DTYPE) if nodes else np.zeros(0, dtype = NODE_DTYPE),
+            np.concatenate(days).astype(DAY_DTYPE) if days else np.zeros(0, dtype = DAY_DTYPE))
+
+
+def save_cascade_log(path, n, offsets, nodes, days, **params):
+    """
+    Description
+    -----------
+    Writes a cascade log to a compressed .npz file.
+
+    Parameters
+    ----------
+    path: The output file
+    n: The number of vertices of the graph
+    offsets, nodes, days: The columns of the log, see encode()
+    params: Extra scalars to record with the log (p, k, seed, ...)
+    """
+    extra = {key: np.asarray(value) for key, value in params.items() if value is not None}
+    np.savez_compressed(path, n = np.int64(n), offsets = offsets, nodes = nodes, days = days, **extra)
+
+
+def load_cascade_log(path):
+    """
+    Description
+    -----------
+    Reads a cascade log written by save_cascade_log(), decompressing its
+    columns into memory.
+
+    Output
+    ------
+    n: The number of vertices of the graph
+    offsets, nodes, days: The columns of the log
+    """
+    with np.load(path) as log:
+        return int(log['n']), log['offsets'], log['nodes'], log['days']
+
+
+def num_of_cascades(offsets):
+    """
+    Returns the number of cascades in a log.
+    """
+    return np.size(offsets) - 1
+
+
+def summarize(offsets, days):
+    """
+    Description
+    -----------
+    Returns the number of infected vertices and the last infection day of
+    each cascade of a log.
+    """
+    offsets = np.asarray(offsets)
+    sizes = np.diff(offsets)
+    nonempty = sizes > 0
+    last_day = np.zeros(sizes.size, dtype = 'int64')
+    if np.any(nonempty):
+        last_day[nonempty] = np.maximum.reduceat(np.asarray(days, dtype = 'int64'), offsets[:-1][nonempty])
+
+    return sizes, last_day
+
+
+def triplets(offsets, nodes, days):
+    """
+    Description
+    -----------
+    Expands log columns into (node, cascade, day) triplets, one per infection.
+    """
+    cascade = np.repeat(np.arange(np.size(offsets) - 1), np.diff(offsets))
+    return np.asarray(nodes, dtype = 'int64'), cascade, np.asarray(days, dtype = 'int64')
+
+
+def iter_batches(offsets, nodes, days, num_of_cascade = None, batch_size = 100):
+    """
+    Description
+    -----------
+    Splits the first num_of_cascade cascades of a loaded log into batches
+    of (node, cascade, day) triplets, with the cascade index local to the
+    batch, so only one batch is expanded at a time.
+
+    Parameters
+    ----------
+    offsets, nodes, days: The columns of the log
+    num_of_cascade: The number of cascades to read (all when omitted)
+    batch_size: The number of cascades per batch
+
+    Output
+    ------
+    Yields (node, cascade, day, size) with size the number of cascades in the batch
+    """
+    total = num_of_cascades(offsets)
+    if num_of_cascade is None:
+        num_of_cascade = total
+    if num_of_cascade > total:
+        raise ValueError('The log holds {} cascades but {} were requested'.format(total, num_of_cascade))
+
+    for start in range(0, num_of_cascade, batch_size):
+        stop = min(start + batch_size, num_of_cascade)
+        lo, hi = offsets[start], offsets[stop]
+        node, cascade, day = triplets(offsets[start:stop + 1] - lo, nodes[lo:hi], days[lo:hi])
+        yield node, cascade, day, stop - start
@@ -0,0 +1,116 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# --------------------------------------------------- #
+#       Diameter and eccentricities by BFS bounds     #
+# --------------------------------------------------- #
+# The exact diameter of a large sparse graph without all-pairs BFS: a
+# 4-sweep (two double sweeps) gives a lower bound and a central start
+# vertex u, and iFUB then walks the BFS levels of u from the deepest one
+# up, computing the eccentricities of one level at a time, until the lower
+# bound meets the upper bound 2 * (level - 1). On real networks this takes
+# a handful of BFS passes instead of n.
+#
+# Reference: P. Crescenzi et al., On computing the diameter of real-world
+# undirected graphs, Theoretical Computer Science 514 (2013).
+
+BFS_BLOCK = 64 # The number of BFS run at once by eccentricities()
+
+
+def bfs_distances(A, sources):
+    """
+    Description
+    -----------
+    Hop distances from each source (scipy.sparse.csgraph breadth-first
+    search on the unweighted graph).
+
+    Output
+    ------
+    A len(sources) x n float numpy array, inf for unreachable vertices
+    """
+    return np.atleast_2d(csgraph.dijkstra(A, directed = False, unweighted = True, indices = sources))
+
+
+def eccentricities(A, vertices):
+    """
+    Returns the eccentricity of each vertex of a connected graph, in blocks of BFS_BLOCK searches.
+    """
+    vertices = np.asarray(vertices, dtype = 'int64')
+    result = np.zeros(vertices.size, dtype = 'int64')
+    for start in range(0, vertices.size, BFS_BLOCK):
+        block = vertices[start:start + BFS_BLOCK]
+        result[start:start + block.size] = bfs_distances(A, block).max(axis = 1)
+    return result
+
+
+def double_sweep(A, start):
+    """
+    Description
+    -----------
+    A BFS from start, then one from the farthest vertex a found; the
+    eccentricity of a is a lower bound on the diameter.
+
+    Output
+    ------
+    lower: The lower bound
+    middle: A vertex halfway along the path from a to the farthest vertex b from it
+    """
+    a = int(np.argmax(bfs_distances(A, [start])[0]))
+    distance_a, predecessors = csgraph.dijkstra(A, directed = False, unweighted = True, indices = a, return_predecessors = True)
+    b = int(np.argmax(distance_a))
+    lower = int(distance_a[b])
+
+    middle = b
+    for _ in range(lower // 2):
+        middle = int(predecessors[middle])
+    return lower, middle
+
+
+def diameter_bounds(A, max_bfs = None):
+    """
+    Description
+    -----------
+    Computes the diameter of the largest connected component of A with the
+    4-sweep and iFUB (see the top of this file).
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of an undirected graph
+    max_bfs: The maximum number of BFS (None: run until the diameter is exact)
+
+    Output
+    ------
+    lower, upper: Bounds on the diameter; equal when it is exact
+    num_bfs: The number of BFS run
+    """
+    A = sparse.csr_matrix(A)
+    _, labels = csgraph.connected_components(A, directed = False)
+    lcc = np.flatnonzero(labels == np.bincount(labels).argmax())
+    A = A[lcc][:, lcc]
+    if lcc.size <= 1:
+        return 0, 0, 0
+
+    # 4-sweep from the vertex of highest degree
+    lower, middle = double_sweep(A, int(np.argmax(np.diff(A.indptr))))
+    lower_2, u = double_sweep(A, middle)
+    lower = max(lower, lower_2)
+    num_bfs = 4
+
+    # iFUB from u
+    distance = bfs_distances(A, [u])[0].astype('int64')
+    num_bfs += 1
+    level = int(distance.max())
+    lower = max(lower, level)
+    upper = 2 * level
+    while lower < upper:
+        fringe = np.flatnonzero(distance == level)
+        if max_bfs is not None and num_bfs + fringe.size > max_bfs:
+            break
+        lower = max(lower, int(eccentricities(A, fringe).max()))
+        num_bfs += fringe.size
+        upper = min(upper, 2 * (level - 1))
+        level -= 1
+
+    return lower, max(lower, upper), num_bfs
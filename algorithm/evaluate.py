@@ -0,0 +1,147 @@
+import numpy as np
+from scipy import sparse
+
+# ------------------------------------------- #
+#       Ground-truth edges of the graph       #
+# ------------------------------------------- #
+def edge_keys(u, v, n):
+    """
+    Description
+    -----------
+    Encodes undirected pairs as int64 keys min(u, v) * n + max(u, v), so
+    sets of edges can be intersected with sorted-array searches.
+
+    Parameters
+    ----------
+    u, v: numpy arrays
+        The endpoints of the pairs
+    n: integer > 0
+        The number of vertices
+
+    Output
+    ------
+    keys: numpy int64 array
+    """
+    u = np.asarray(u, dtype = 'int64')
+    v = np.asarray(v, dtype = 'int64')
+    return np.minimum(u, v) * n + np.maximum(u, v)
+
+
+def true_edges(A):
+    """
+    Description
+    -----------
+    Returns the undirected edges of A (upper triangle, no self-loops).
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of the graph
+
+    Output
+    ------
+    rows, cols: numpy arrays with rows < cols
+    """
+    upper = sparse.triu(A, k = 1, format = 'coo')
+    keep = upper.data != 0
+    return upper.row[keep], upper.col[keep]
+
+
+def num_of_true_edges(A):
+    """
+    Returns the number of undirected edges of A.
+    """
+    rows, _ = true_edges(A)
+    return rows.size
+
+
+# ---------------------------- #
+#       Edge correctness       #
+# ---------------------------- #
+def edge_correctness(A, edges):
+    """
+    Description
+    -----------
+    The fraction of the edges of A that appear in the predicted edge list.
+    Both sides are encoded as sorted int64 keys and intersected, so this
+    takes O(m) memory and never touches A element by element.
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of the graph
+    edges: list of (u, v) or k x 2 numpy array
+        The predicted undirected edges
+
+    Output
+    ------
+    EC: float in [0, 1]
+    """
+    n = np.shape(A)[0]
+    rows, cols = true_edges(A)
+    if rows.size == 0:
+        return 0.0
+
+    edges = np.asarray(edges, dtype = 'int64').reshape(-1, 2)
+    predicted = np.unique(edge_keys(edges[:, 0], edges[:, 1], n))
+    truth = np.unique(edge_keys(rows, cols, n))
+    num_of_correct_edges = np.intersect1d(predicted, truth, assume_unique = True).size
+
+    return float(num_of_correct_edges / truth.size)
+
+
+# ------------------------------- #
+#       Mean absolute error       #
+# ------------------------------- #
+def absolute_error(A, predicted_p, p):
+    """
+    Description
+    -----------
+    The sum, over the edges of A, of |predicted_p[i, j] - p|. The estimates
+    are gathered from the sparse prediction at A's edges only.
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of the graph
+    predicted_p: n x n scipy sparse matrix
+        The predicted weight of each pair
+    p: float or None
+        The true transmission probability (None: the per-edge probabilities in the data of A)
+
+    Output
+    ------
+    The summed absolute error
+    """
+    rows, cols = true_edges(A)
+    estimates = np.asarray(sparse.csr_matrix(predicted_p)[rows, cols], dtype = 'float').ravel()
+    if p is None:
+        p = np.asarray(sparse.csr_matrix(A)[rows, cols], dtype = 'float').ravel()
+
+    return float(np.abs(estimates - p).sum())
+
+
+def mean_absolute_error(A, predicted_p, p):
+    """
+    Description
+    -----------
+    The mean, over the edges of A, of |predicted_p[i, j] - p|.
+
+    Parameters
+    ----------
+    A: n x n scipy sparse matrix
+        The adjacency matrix of the graph
+    predicted_p: n x n scipy sparse matrix
+        The predicted weight of each pair
+    p: float or None
+        The true transmission probability (None: the per-edge probabilities in the data of A)
+
+    Output
+    ------
+    mae: float
+    """
+    m = num_of_true_edges(A)
+    if m == 0:
+        return 0.0
+
+    return float(absolute_error(A, predicted_p, p) / m)
@@ -0,0 +1,140 @@
+import numpy as np
+import algorithm.prep as prep
+
+# --------------------------------------------------- #
+#       Random graphs generated directly as CSR       #
+# --------------------------------------------------- #
+# The generators return edge arrays (u, v) instead of networkx graphs, so
+# graphs with millions of vertices are made in seconds; prep.to_adjacency()
+# turns them into the symmetric adjacency matrix the learners use.
+
+GNP_CHUNK = 1 << 22 # The number of geometric gaps drawn at once
+
+
+def pair_from_index(k):
+    """
+    Decodes the index k = j (j - 1) / 2 + i of the pair i < j.
+    """
+    k = np.asarray(k, dtype = 'int64')
+    j = ((1 + np.sqrt(1 + 8 * k.astype('float64'))) // 2).astype('int64')
+    # Correct the rounding of the square root
+    j -= j * (j - 1) // 2 > k
+    j += (j + 1) * j // 2 <= k
+    return k - j * (j - 1) // 2, j
+
+
+def gnp_edges(n, p, rng = None):
+    """
+    Description
+    -----------
+    Draws the edges of an Erdos-Renyi G(n, p) graph by geometric skipping:
+    the gaps between consecutive edges in the list of the n (n - 1) / 2
+    pairs are geometric with parameter p, so the work is proportional to
+    the number of edges instead of the number of pairs.
+
+    Output
+    ------
+    u, v: int64 numpy arrays of the edges, u < v
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    num_pairs = n * (n - 1) // 2
+    if p <= 0 or num_pairs == 0:
+        return np.zeros(0, dtype = 'int64'), np.zeros(0, dtype = 'int64')
+    if p >= 1:
+        return pair_from_index(np.arange(num_pairs))
+
+    chunk = int(min(GNP_CHUNK, max(1024, 1.1 * p * num_pairs + 1024)))
+    indices = []
+    last = -1
+    while last < num_pairs:
+        position = last + np.cumsum(rng.geometric(p, chunk))
+        indices.append(position[position < num_pairs])
+        last = position[-1]
+
+    return pair_from_index(np.concatenate(indices))
+
+
+def bound_degree(u, v, n, max_d, rng = None):
+    """
+    Description
+    -----------
+    Thins a graph to a maximum degree: every vertex ranks its edges in one
+    shared random order and an edge is kept if it is among the first max_d
+    edges of both of its endpoints.
+
+    Output
+    ------
+    u, v: The kept edges
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    m = np.size(u)
+    priority = rng.permutation(m)
+
+    # Each edge appears once per endpoint; rank the appearances of each vertex by priority
+    endpoint = np.r_[u, v]
+    edge = np.r_[np.arange(m), np.arange(m)]
+    order = np.argsort(endpoint * m + priority[edge])
+    endpoint, edge = endpoint[order], edge[order]
+    starts = np.flatnonzero(np.r_[True, endpoint[1:] != endpoint[:-1]])
+    rank = np.arange(2 * m) - np.repeat(starts, np.diff(np.r_[starts, 2 * m]))
+
+    keep = np.bincount(edge[rank < max_d], minlength = m) == 2
+    return u[keep], v[keep]
+
+
+def random_tree_edges(n, rng = None):
+    """
+    Description
+    -----------
+    Draws a uniformly random labelled tree on n vertices by decoding a
+    random Pruefer sequence in linear time.
+
+    Output
+    ------
+    u, v: int64 numpy arrays of the n - 1 edges
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if n <= 1:
+        return np.zeros(0, dtype = 'int64'), np.zeros(0, dtype = 'int64')
+
+    sequence = rng.integers(0, n, n - 2).tolist()
+    degree = (np.bincount(sequence, minlength = n) + 1).tolist()
+    u, v = [], []
+
+    # The smallest leaf, advanced by the pointer; a vertex that becomes a leaf below it is used at once
+    pointer = degree.index(1)
+    leaf = pointer
+    for x in sequence:
+        u.append(leaf)
+        v.append(x)
+        degree[x] -= 1
+        if degree[x] == 1 and x < pointer:
+            leaf = x
+        else:
+            pointer += 1
+            while degree[pointer] != 1:
+                pointer += 1
+            leaf = pointer
+
+    u.append(leaf)
+    v.append(n - 1)
+    return np.asarray(u, dtype = 'int64'), np.asarray(v, dtype = 'int64')
+
+
+def gnp_graph(n, p, max_d = None, rng = None):
+    """
+    Returns the adjacency matrix of a G(n, p) graph, thinned to a maximum degree max_d if given.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    u, v = gnp_edges(n, p, rng)
+    if max_d is not None:
+        u, v = bound_degree(u, v, n, max_d, rng)
+    return prep.to_adjacency(u, v, n)
+
+
+def random_tree(n, rng = None):
+    """
+    Returns the adjacency matrix of a uniformly random tree on n vertices.
+    """
+    u, v = random_tree_edges(n, rng)
+    return prep.to_adjacency(u, v, n)
@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+from scipy import sparse
+
+# -------------------------------------------------------- #
+#       Memory-mapped CSR store of the shipped graphs      #
+# -------------------------------------------------------- #
+# sparse.load_npz decompresses the whole adjacency matrix and every process
+# that loads it holds its own copy. The store keeps each graph uncompressed
+# next to its npz file, in a <name>.csr directory:
+#
+#     indptr.npy, indices.npy, data.npy   the CSR arrays
+#     meta.json                           shape, nnz and the source npz
+#
+# open_store() maps the arrays read-only, so opening a graph costs almost
+# nothing and all processes that open it share the same pages of the page
+# cache. Pool workers are handed the store directory instead of the matrix,
+# see source_directory().
+
+ARRAYS = ("indptr", "indices", "data")
+
+
+def store_path(npz_path):
+    """
+    Returns the store directory of an npz file (graph.npz -> graph.csr).
+    """
+    return os.path.splitext(npz_path)[0] + ".csr"
+
+
+def source_stamp(npz_path):
+    """
+    The size and modification time of an npz file, used to detect a stale store.
+    """
+    status = os.stat(npz_path)
+    return {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+
+
+def convert(npz_path, directory = None):
+    """
+    Description
+    -----------
+    Writes an npz adjacency matrix to the uncompressed store layout.
+
+    Parameters
+    ----------
+    npz_path: The npz file, as written by sparse.save_npz
+    directory: The store directory (default: store_path(npz_path))
+
+    Output
+    ------
+    The store directory
+    """
+    directory = directory or store_path(npz_path)
+    A = sparse.csr_matrix(sparse.load_npz(npz_path))
+    A.sum_duplicates()
+    A.sort_indices()
+
+    # Build in a private sibling directory, never in the files other processes may have mapped
+    parent = os.path.dirname(os.path.abspath(directory))
+    building = tempfile.mkdtemp(dir = parent, prefix = os.path.basename(directory) + ".", suffix = ".tmp")
+    for name in ARRAYS:
+        np.save(os.path.join(building, name + ".npy"), getattr(A, name))
+
+    meta = {"shape": list(A.shape),
+            "nnz": int(A.nnz),
+            "source": os.path.basename(npz_path),
+            "source_stamp": source_stamp(npz_path)}
+    with open(os.path.join(building, "meta.json"), "w") as out:
+        json.dump(meta, out, indent = 1)
+
+    # Keep a current store that another process published while this one was building
+    if is_current(npz_path, directory):
+        shutil.rmtree(building, ignore_errors = True)
+    else:
+        publish(building, directory)
+    return directory
+
+
+def publish(building, directory):
+    """
+    Description
+    -----------
+    Renames a complete store into place, so a store directory only ever
+    appears whole. A stale store is renamed away first and deleted; the
+    processes that still map its files keep reading them. If another
+    process published the store in the meantime, its store is kept.
+    """
+    stale = building + ".old"
+    try:
+        os.rename(directory, stale)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.rename(building, directory)
+    except OSError:
+        # Another process has just published its store
+        shutil.rmtree(building, ignore_errors = True)
+    shutil.rmtree(stale, ignore_errors = True)
+
+
+def read_meta(directory):
+    """
+    Returns the meta.json of a store, or None if there is none.
+    """
+    try:
+        with open(os.path.join(directory, "meta.json")) as meta:
+            return json.load(meta)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(npz_path, directory = None):
+    """
+    Whether the store of an npz file exists and was built from its current version.
+    """
+    meta = read_meta(directory or store_path(npz_path))
+    return meta is not None and meta["source_stamp"] == source_stamp(npz_path)
+
+
+def open_store(directory):
+    """
+    Description
+    -----------
+    Opens a store as a read-only CSR matrix whose arrays are memory-mapped
+    from the store files (no copy is made).
+
+    Output
+    ------
+    A scipy.sparse.csr_matrix
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        raise ValueError('No graph store in {}'.format(directory))
+
+    indptr, indices, data = [np.load(os.path.join(directory, name + ".npy"), mmap_mode = 'r') for name in ARRAYS]
+    A = sparse.csr_matrix((data, indices, indptr), shape = tuple(meta["shape"]), copy = False)
+    A.has_sorted_indices = True
+    return A
+
+
+def load(npz_path):
+    """
+    Opens the store of an npz file, (re)building it first if it is missing or stale.
+    """
+    directory = store_path(npz_path)
+    if not is_current(npz_path, directory):
+        convert(npz_path, directory)
+    return open_store(directory)
+
+
+def source_directory(A):
+    """
+    Returns the store directory that A is mapped from, or None if A is an
+    ordinary in-memory matrix.
+    """
+    if not sparse.isspmatrix_csr(A):
+        return None
+
+    base = A.indptr
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    if base is None or base.filename is None:
+        return None
+    return os.path.dirname(base.filename)
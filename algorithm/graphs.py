@@ -0,0 +1,70 @@
+import os
+from scipy import sparse
+import math
+import algorithm.graph_store as gs
+import algorithm.metadata as am
+
+# ------------------------------------------------------ #
+#       The shipped graphs and their learning settings   #
+# ------------------------------------------------------ #
+# The same parameters as the main_learn_* scripts:
+#   tree_<n>:  random trees, p = 0.9
+#   gnp_<n>:   degree-bounded random graphs, p = 0.15, max_d = the maximum degree
+#   <name>:    real networks, p = 0.15, max_d = the average degree rounded up,
+#              frontier simulator, MAE reported with a correction factor of 2
+# The degrees are read from the metadata cache, see metadata.graph_metadata().
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # The repository root
+
+MAX_ITER = 1000
+
+
+def graph_path(name):
+    """
+    Returns the npz file of a shipped graph (tree_500, gnp_1000, newman, ...).
+    """
+    if name.startswith("tree_"):
+        return os.path.join(ROOT, "random_network", "tree", name + ".npz")
+    if name.startswith("gnp_"):
+        return os.path.join(ROOT, "random_network", "degree_bounded", name + ".npz")
+    return os.path.join(ROOT, "real_network", name, name + ".npz")
+
+
+def graph_setting(name):
+    """
+    Description
+    -----------
+    Returns the learning setting of a shipped graph.
+
+    Output
+    ------
+    A dict with the graph's family ('tree' or 'degree_bounded'), the
+    transmission probability p, the degree bound max_d (None for trees),
+    the maximum number of days k, the simulator and the MAE correction.
+    """
+    if name.startswith("tree_"):
+        return {"family": "tree", "p": 0.9, "max_d": None, "k": MAX_ITER, "simulator": "batch", "correction": 1}
+
+    meta = am.graph_metadata(graph_path(name))
+    if name.startswith("gnp_"):
+        return {"family": "degree_bounded", "p": 0.15, "max_d": meta["max_degree"], "k": MAX_ITER, "simulator": "batch", "correction": 1}
+    return {"family": "degree_bounded", "p": 0.15, "max_d": real_degree_bound(meta), "k": MAX_ITER, "simulator": "frontier", "correction": 2}
+
+
+def real_degree_bound(meta):
+    """
+    The degree bound of a real network: its maximum degree is set by a few
+    hubs, far above a typical vertex, so the average degree rounded up is
+    used instead.
+    """
+    return max(1, math.ceil(meta["avg_degree"]))
+
+
+def load_graph(name, mapped = True):
+    """
+    Loads the adjacency matrix of a shipped graph, memory-mapped from its
+    graph store (see graph_store.load()) unless mapped is False.
+    """
+    if mapped:
+        return gs.load(graph_path(name))
+    return sparse.load_npz(graph_path(name))
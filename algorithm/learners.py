@@ -0,0 +1,163 @@
+import numpy as np
+from scipy import sparse
+import algorithm.algo as aa
+import algorithm.evaluate as ae
+
+# ------------------------------------------------------------------ #
+#       Incremental learners: sufficient statistics as state         #
+# ------------------------------------------------------------------ #
+# Each learner keeps the co-infection counts H, the ordered co-infection
+# counts F and the infection counts J of every cascade it has seen, so a
+# sweep over the number of cascades (10, 20, ..., 100) only pays for the
+# new cascades at each step. Example:
+#
+#     learner = TreeStructureLearner(n)
+#     for step in range(10):
+#         learner.partial_fit(aa.run_cascades(A, p, k, 10))
+#         print(learner.num_of_cascade, learner.score(A))
+
+class CascadeLearner:
+    """
+    Description
+    -----------
+    The state shared by all learners: the merged statistics (H, F, J) of
+    the cascades seen so far, see algo.cascade_statistics().
+
+    Parameters
+    ----------
+    n: The number of vertices of the graph
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.num_of_cascade = 0
+        self.H = sparse.csr_matrix((n, n), dtype = 'int64')
+        self.F = sparse.csr_matrix((n, n), dtype = 'int64')
+        self.J = np.zeros(n, dtype = 'int64')
+
+    def add_statistics(self, H, F, J, num_of_cascade):
+        """
+        Merges the statistics of num_of_cascade further cascades, e.g. as
+        returned by algo.simulate_statistics() or algo.log_statistics().
+        """
+        if np.shape(H)[0] != self.n:
+            raise ValueError('The statistics are for {} vertices, not {}'.format(np.shape(H)[0], self.n))
+
+        self.H, self.F, self.J = aa.merge_statistics([(self.H, self.F, self.J), (H, F, J)], self.n)
+        self.num_of_cascade += num_of_cascade
+        return self
+
+    def partial_fit(self, v_day):
+        """
+        Description
+        -----------
+        Adds a batch of cascades.
+
+        Parameters
+        ----------
+        v_day: n x C integer numpy array
+            The infection day of each vertex in each cascade (NEVER if not infected), see algo.run_cascades()
+        """
+        H, F, J = aa.cascade_statistics(v_day)
+        return self.add_statistics(H, F, J, np.shape(v_day)[1])
+
+    def check_fitted(self):
+        if self.num_of_cascade == 0:
+            raise ValueError('No cascades have been added yet')
+
+
+# ------------------------------------------------------ #
+#       Learn the structure of bidirectional tree        #
+# ------------------------------------------------------ #
+class TreeStructureLearner(CascadeLearner):
+    """
+    The incremental form of algo.learn_tree_structure().
+    """
+
+    def predict(self):
+        """
+        Returns the current tree as a list of edges (u, v).
+        """
+        self.check_fitted()
+        return aa.maximum_spanning_tree(sparse.triu(self.H, k = 1), self.n)
+
+    def score(self, A):
+        """
+        Returns the edge correctness of the current tree.
+        """
+        return ae.edge_correctness(A, self.predict())
+
+
+# ---------------------------------------------------- #
+#       Learn the weights of bidirectional tree        #
+# ---------------------------------------------------- #
+class TreeWeightLearner(CascadeLearner):
+    """
+    The incremental form of algo.learn_tree_weight().
+    """
+
+    def predict(self):
+        """
+        Returns the current weight estimates as an n x n sparse matrix.
+        """
+        self.check_fitted()
+        return aa.estimate_tree_weight(self.F, self.J, self.num_of_cascade)
+
+    def score(self, A, p):
+        """
+        Returns the mean absolute error of the current estimates.
+        """
+        return ae.mean_absolute_error(A, self.predict(), p)
+
+
+# ----------------------------------------------------------------- #
+#           Learn the structure of the degree bounded graph         #
+# ----------------------------------------------------------------- #
+class DegreeBoundedStructureLearner(CascadeLearner):
+    """
+    The incremental form of algo.learn_degree_bounded_structure().
+
+    Parameters
+    ----------
+    n: The number of vertices of the graph
+    max_d: The maximum degree of the graph
+    """
+
+    def __init__(self, n, max_d):
+        CascadeLearner.__init__(self, n)
+        self.max_d = max_d
+
+    def predict(self):
+        """
+        Returns the current edges (u, v) under the maximum degree.
+        """
+        self.check_fitted()
+        return aa.select_degree_bounded_edges(self.H, self.max_d)
+
+    def score(self, A):
+        """
+        Returns the edge correctness of the current edges.
+        """
+        return ae.edge_correctness(A, self.predict())
+
+
+# ------------------------------------------------------------ #
+#        Learn the weights of the degree bounded graph         #
+# ------------------------------------------------------------ #
+class DegreeBoundedWeightLearner(CascadeLearner):
+    """
+    The incremental form of algo.learn_degree_bounded_weight().
+    """
+
+    def predict(self):
+        """
+        Returns the current weight estimates as an n x n sparse matrix.
+        """
+        self.check_fitted()
+        return aa.estimate_degree_bounded_weight(self.H, self.F, self.J, self.num_of_cascade)
+
+    def score(self, A, p):
+        """
+        Returns the error of the current estimates, as reported by algo.learn_degree_bounded_weight().
+        """
+        return aa.degree_bounded_error(A, self.predict(), p, self.num_of_cascade)
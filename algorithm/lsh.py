@@ -0,0 +1,149 @@
+import numpy as np
+from scipy import sparse
+
+# ------------------------------------------------------------- #
+#       MinHash / LSH candidate pairs for very large graphs     #
+# ------------------------------------------------------------- #
+# Two adjacent vertices are infected in many of the same cascades, so the
+# sets of cascades that infected them have a high Jaccard similarity.
+# Instead of counting the co-infections of every pair, each vertex gets a
+# MinHash signature of its set of cascades, the signatures are cut into
+# bands, and the vertices whose signatures agree on a whole band are
+# proposed as candidate pairs. Only the candidates are then counted exactly
+# (candidate_coinfection()), so the memory grows with the number of
+# candidates instead of the number of co-infected pairs.
+#
+# With b bands of r rows, a pair of Jaccard similarity s becomes a
+# candidate with probability 1 - (1 - s^r)^b; the defaults (32 bands of 4
+# rows) pass pairs above s ~ 0.4 almost surely.
+
+PRIME = (1 << 31) - 1 # The modulus of the MinHash functions (a * c + b) % PRIME
+
+NUM_BANDS = 32
+
+BAND_ROWS = 4
+
+MAX_BUCKET = 1000 # Buckets with more vertices than this propose no pairs
+
+HASH_CHUNK = 16 # The number of hash functions evaluated at once
+
+PAIR_CHUNK = 1 << 18 # The number of candidate pairs counted at once
+
+
+def minhash_signatures(node, c, n, num_hashes, seed = 0):
+    """
+    Description
+    -----------
+    Computes the MinHash signature of the set of cascades that infected
+    each vertex, using the hash functions (a * c + b) % PRIME.
+
+    Parameters
+    ----------
+    node, c: numpy arrays
+        Vertex node[x] was infected in cascade c[x]
+    n: The number of vertices
+    num_hashes: The length of the signatures
+    seed: The seed of the hash functions
+
+    Output
+    ------
+    An n x num_hashes int64 numpy array; the rows of vertices that were
+    never infected are PRIME
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, PRIME, num_hashes)
+    b = rng.integers(0, PRIME, num_hashes)
+
+    signatures = np.full((n, num_hashes), PRIME, dtype = 'int64')
+    if np.size(node) == 0:
+        return signatures
+
+    # Group the infections by vertex, so each minimum is a reduceat over a run
+    order = np.argsort(node, kind = 'stable')
+    node, c = np.asarray(node)[order], np.asarray(c, dtype = 'int64')[order]
+    starts = np.flatnonzero(np.r_[True, node[1:] != node[:-1]])
+
+    for first in range(0, num_hashes, HASH_CHUNK):
+        last = min(num_hashes, first + HASH_CHUNK)
+        hashed = (c[:, None] * a[first:last] + b[first:last]) % PRIME
+        signatures[node[starts], first:last] = np.minimum.reduceat(hashed, starts, axis = 0)
+    return signatures
+
+
+def band_pairs(keys, members, max_bucket = MAX_BUCKET):
+    """
+    Returns every pair (u, v), u < v, of members that share a key, skipping
+    the keys shared by more than max_bucket members.
+    """
+    order = np.argsort(keys, kind = 'stable')
+    keys, members = keys[order], members[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], keys.size]
+    sizes = ends - starts
+
+    size = np.repeat(sizes, sizes)
+    position = np.flatnonzero((size > 1) & (size <= max_bucket))
+    end = np.repeat(ends, sizes)[position]
+
+    # Pair each member with the members after it in its bucket
+    count = end - position - 1
+    left = np.repeat(position, count)
+    right = left + 1 + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    u, v = members[left], members[right]
+    return np.minimum(u, v), np.maximum(u, v)
+
+
+def lsh_candidates(signatures, num_bands = NUM_BANDS, band_rows = BAND_ROWS, max_bucket = MAX_BUCKET):
+    """
+    Description
+    -----------
+    Proposes the pairs of vertices whose signatures agree on at least one
+    band of band_rows consecutive hashes. Vertices that were never infected
+    take part in no pair.
+
+    Output
+    ------
+    u, v: numpy arrays of the candidate pairs, u < v, without duplicates
+    """
+    n = np.shape(signatures)[0]
+    if num_bands * band_rows > np.shape(signatures)[1]:
+        raise ValueError('{} bands of {} rows need {} hashes, the signatures have {}'.format(num_bands, band_rows, num_bands * band_rows, np.shape(signatures)[1]))
+
+    members = np.flatnonzero(signatures[:, 0] != PRIME)
+    multipliers = np.random.default_rng(0).integers(1, 1 << 62, band_rows).astype('uint64') | np.uint64(1)
+
+    pairs = [np.zeros(0, dtype = 'int64')]
+    for band in range(num_bands):
+        rows = signatures[members, band * band_rows:(band + 1) * band_rows].astype('uint64')
+        # One 64-bit key per band; a collision only adds a candidate, which is then scored exactly
+        keys = (rows * multipliers).sum(axis = 1, dtype = 'uint64')
+        u, v = band_pairs(keys, members, max_bucket)
+        pairs.append(u * n + v)
+
+    pairs = np.unique(np.concatenate(pairs))
+    return pairs // n, pairs % n
+
+
+def candidate_coinfection(node, c, n, num_of_cascade, u, v):
+    """
+    Description
+    -----------
+    Counts exactly, for each candidate pair (u, v), the cascades in which
+    both were infected.
+
+    Output
+    ------
+    H: n x n scipy sparse matrix
+        The co-infection counts of the candidate pairs (u, v), u < v, as an
+        upper triangle, see algo.coinfection_counts()
+    """
+    # One row per vertex, one column per cascade
+    X = sparse.csr_matrix((np.ones(np.size(node), dtype = 'int64'), (node, c)), shape = (n, num_of_cascade))
+    counts = np.zeros(np.size(u), dtype = 'int64')
+    for first in range(0, np.size(u), PAIR_CHUNK):
+        last = min(np.size(u), first + PAIR_CHUNK)
+        counts[first:last] = np.asarray(X[u[first:last]].multiply(X[v[first:last]]).sum(axis = 1)).ravel()
+
+    keep = counts > 0
+    u, v, counts = u[keep], v[keep], counts[keep]
+    return sparse.csr_matrix((counts, (u, v)), shape = (n, n))
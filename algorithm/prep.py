@@ -0,0 +1,246 @@
+import os
+import itertools
+import numpy as np
+from scipy import sparse
+import algorithm.evaluate as ae
+import algorithm.metadata as am
+
+# ------------------------------------------------------ #
+#       Data preparation of the real networks            #
+# ------------------------------------------------------ #
+# Every real network goes through the same pipeline (prepare_network()):
+#   1. parse the raw edge list (space or comma separated, or .mtx)
+#   2. keep the largest connected component, relabelled 0 .. n - 1, without loops
+#   3. write <prefix>_g1.edges, the random ground truth mapping
+#      <prefix>_gt_mapping.txt and the adjacency matrix <name>.npz
+#   4. write the perturbed copies <prefix>_<p>_g2.edges: g1 relabelled by
+#      the ground truth mapping plus a share p of extra random edges. All
+#      levels are drawn in one pass and nested, the noise edges of a level
+#      being the first ones of every higher level.
+# Everything stays in numpy / scipy arrays; no networkx graph is built.
+
+PERTURBATION_PROBABILITY = [0, 0.01, 0.03, 0.05, 0.07, 0.09, 0.11, 0.13, 0.15, 0.17, 0.19, 0.21, 0.23, 0.25]
+
+# The raw edge list and the output prefix of each network in real_network/.
+# erdos is shipped without its raw edge list, so it cannot be rebuilt.
+NETWORKS = {"bio": ("bio_g1_raw.edges", "bio"),
+            "bio2": ("bio2_raw.edges", "bio2"),
+            "econ": ("econ_weighted.mtx", "econ"),
+            "fb": ("fb_raw.edges", "fb"),
+            "google": ("google_raw.ego-gplus", "google"),
+            "newman": ("newman_g1.edgelist", "newman"),
+            "retweet": ("retweet_raw.edges", "retweet"),
+            "retweet2": ("retweet_2_raw.edges", "retweet_2"),
+            "router": ("router.mtx", "router"),
+            "social": ("social_raw.arenas-pgp", "social")}
+
+COMMENTS = ("%", "#")
+
+
+def next_data_line(f):
+    """
+    Returns the next line of f that is neither blank nor a comment ('' at the end).
+    """
+    line = f.readline()
+    while line and (not line.strip() or line.lstrip().startswith(COMMENTS)):
+        line = f.readline()
+    return line
+
+
+def read_edges(path):
+    """
+    Description
+    -----------
+    Parses an edge list with one edge per line, the endpoints being the
+    first two space or comma separated integers (further columns such as
+    weights or timestamps are ignored). Lines starting with % or # are
+    comments; in a Matrix Market file (%%MatrixMarket header) the size line
+    after the header is skipped too. The separator is taken from the first
+    edge and np.loadtxt converts only the first two columns, straight to
+    int64, so no array of string tokens is built.
+
+    Output
+    ------
+    u, v: int64 numpy arrays of the endpoints, as labelled in the file
+    """
+    with open(path) as f:
+        matrix_market = f.readline().startswith("%%MatrixMarket")
+        f.seek(0)
+        line = next_data_line(f)
+        if matrix_market:
+            line = next_data_line(f)
+        if not line:
+            return np.zeros(0, dtype = 'int64'), np.zeros(0, dtype = 'int64')
+
+        # Parse the first edge and the rest of the file
+        delimiter = "," if "," in line else None
+        edges = np.loadtxt(itertools.chain([line], f), dtype = 'int64', comments = COMMENTS, delimiter = delimiter, usecols = (0, 1), ndmin = 2)
+    return edges[:, 0], edges[:, 1]
+
+
+def largest_component_edges(u, v):
+    """
+    Description
+    -----------
+    Keeps the largest connected component of a graph given by its edges,
+    relabels its vertices 0 .. n - 1 (in the order of their original
+    labels) and removes the loops and repeated edges.
+
+    Output
+    ------
+    u, v: The edges of the component, u < v, sorted
+    n: The number of vertices of the component
+    """
+    labels, inverse = np.unique(np.r_[u, v], return_inverse = True)
+    u, v = inverse[:np.size(u)], inverse[np.size(u):]
+    A = to_adjacency(u, v, labels.size)
+
+    in_lcc = np.zeros(labels.size, dtype = 'bool')
+    in_lcc[am.largest_component(A)] = True
+    relabel = np.cumsum(in_lcc) - 1
+    n = int(in_lcc.sum())
+
+    keep = in_lcc[u] & (u != v)
+    keys = np.unique(ae.edge_keys(relabel[u[keep]], relabel[v[keep]], n))
+    return keys // n, keys % n, n
+
+
+def to_adjacency(u, v, n):
+    """
+    Returns the symmetric 0/1 adjacency matrix of an undirected graph as an n x n scipy sparse matrix.
+    """
+    A = sparse.csr_matrix((np.ones(np.size(u), dtype = 'int64'), (u, v)), shape = (n, n))
+    A = A + A.T
+    A.data[:] = 1
+    return A
+
+
+def write_mapping(path, mapping):
+    """
+    Writes a ground truth mapping, one "i mapping[i]" line per vertex.
+    """
+    write_edges(path, np.arange(np.size(mapping)), mapping)
+
+
+def noise_edges(u, v, n, num_edges, rng = None):
+    """
+    Description
+    -----------
+    Draws num_edges distinct random pairs (i, j), i != j, that are not
+    edges of the graph, in batches: each batch is checked against the
+    sorted keys of the edges (see evaluate.edge_keys()) and of the pairs
+    accepted so far, keeping the first draw of each new pair.
+
+    Parameters
+    ----------
+    u, v: numpy arrays
+        The edges of the graph
+    n: The number of vertices
+    num_edges: The number of pairs to draw
+    rng: A numpy Generator (optional)
+
+    Output
+    ------
+    i, j: numpy arrays of the pairs, in the order they were drawn
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    existing = np.unique(ae.edge_keys(u, v, n))
+    if num_edges > n * (n - 1) // 2 - existing.size:
+        raise ValueError('The graph has fewer than {} non-edges'.format(num_edges))
+
+    taken = existing # The sorted keys of the edges and of the pairs accepted so far
+    drawn_i, drawn_j = [np.zeros(0, dtype = 'int64')], [np.zeros(0, dtype = 'int64')]
+    remaining = num_edges
+    while remaining > 0:
+        size = max(1024, 2 * remaining)
+        i = rng.integers(0, n, size)
+        j = rng.integers(0, n, size)
+        keys = ae.edge_keys(i, j, n)
+
+        # Reject the loops, the edges and the pairs already accepted
+        new = i != j
+        if taken.size:
+            new &= taken[np.minimum(np.searchsorted(taken, keys), taken.size - 1)] != keys
+        i, j, keys = i[new], j[new], keys[new]
+
+        # Keep the first draw of each pair
+        _, first = np.unique(keys, return_index = True)
+        first = np.sort(first)[:remaining]
+        drawn_i.append(i[first])
+        drawn_j.append(j[first])
+        taken = np.union1d(taken, keys[first])
+        remaining -= first.size
+
+    return np.concatenate(drawn_i), np.concatenate(drawn_j)
+
+
+def perturbation_levels(u, v, n, probabilities = PERTURBATION_PROBABILITY, rng = None):
+    """
+    Description
+    -----------
+    Generates the perturbed graphs of every level in one pass: level p adds
+    int(m * p) noise edges to the m edges (u, v), and the noise edges of a
+    level are the first ones of the next.
+
+    Output
+    ------
+    Yields (p, i, j) with (i, j) the edges of the perturbed graph
+    """
+    counts = [int(np.size(u) * p) for p in probabilities]
+    noise_i, noise_j = noise_edges(u, v, n, max(counts, default = 0), rng)
+    for p, count in zip(probabilities, counts):
+        yield p, np.r_[u, noise_i[:count]], np.r_[v, noise_j[:count]]
+
+
+def write_edges(path, u, v):
+    """
+    Writes an edge list, one "u v" line per edge.
+    """
+    np.savetxt(path, np.column_stack((u, v)), fmt = '%d')
+
+
+def write_perturbation_levels(pattern, u, v, n, probabilities = PERTURBATION_PROBABILITY, rng = None):
+    """
+    Writes the perturbed graph of each level p to pattern.format(p), see perturbation_levels().
+    """
+    for p, i, j in perturbation_levels(u, v, n, probabilities, rng):
+        write_edges(pattern.format(p), i, j)
+
+
+def prepare_network(directory, raw_file, prefix, npz_name = None, probabilities = PERTURBATION_PROBABILITY, rng = None):
+    """
+    Description
+    -----------
+    Runs the whole pipeline on one network, see the top of this file.
+
+    Parameters
+    ----------
+    directory: The directory of the network; all files are read and written there
+    raw_file: The raw edge list
+    prefix: The prefix of the g1, ground truth mapping and g2 files
+    npz_name: The name of the adjacency matrix file (default: the directory name + .npz)
+    probabilities: The perturbation levels (None writes no perturbed copies)
+    rng: A numpy Generator (optional)
+
+    Output
+    ------
+    The adjacency matrix of the largest component
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    npz_name = npz_name or os.path.basename(os.path.normpath(directory)) + ".npz"
+
+    u, v = read_edges(os.path.join(directory, raw_file))
+    u, v, n = largest_component_edges(u, v)
+    print("Number of nodes: {}\nNumber of edges: {}\nAverage degree: {:.4f}".format(n, u.size, 2 * u.size / n if n else 0))
+
+    write_edges(os.path.join(directory, prefix + "_g1.edges"), u, v)
+    A = to_adjacency(u, v, n)
+    sparse.save_npz(os.path.join(directory, npz_name), A)
+
+    # The ground truth mapping: a random permutation of the vertices
+    mapping = rng.permutation(n)
+    write_mapping(os.path.join(directory, prefix + "_gt_mapping.txt"), mapping)
+
+    if probabilities is not None:
+        write_perturbation_levels(os.path.join(directory, prefix + "_{}_g2.edges"), mapping[u], mapping[v], n, probabilities, rng)
+    return A
@@ -0,0 +1,123 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+
+# ------------------------------------------ #
+#       Per-phase profiling of a run         #
+# ------------------------------------------ #
+class Profiler:
+    """
+    Description
+    -----------
+    Records, for each phase of a learner (simulating, accumulating,
+    selecting, estimating, evaluating, ...), its wall time, number of calls
+    and peak traced memory, plus per-cascade statistics: the number of days
+    until extinction, the number of infected vertices and whether the
+    max_iter cap was hit. Pass one as profiler= to the learn_* functions
+    and dump() it as JSON.
+
+    Parameters
+    ----------
+    trace_memory: Whether to trace the peak memory of each phase with tracemalloc
+    """
+
+    def __init__(self, trace_memory = True):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.days = []
+        self.infected = []
+        self.capped = []
+        self.peaks = [] # The running peak of each open phase
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block as one call of phase name.
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.trace_memory:
+            # Fold the peak so far into the enclosing phase before resetting it
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.peaks.append(0)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            peak = None
+            if self.trace_memory:
+                peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+            self.add_phase(name, wall, 1, peak)
+
+    def add_phase(self, name, wall, calls = 1, peak = None):
+        """
+        Adds calls to phase name that were timed elsewhere (e.g. in pool workers).
+        """
+        entry = self.phases.setdefault(name, {"calls": 0, "wall_s": 0.0, "peak_bytes": None})
+        entry["calls"] += calls
+        entry["wall_s"] += wall
+        if peak is not None:
+            entry["peak_bytes"] = max(entry["peak_bytes"] or 0, int(peak))
+
+    def record_cascades(self, sizes, last_day, k):
+        """
+        Description
+        -----------
+        Records the per-cascade statistics of a batch of cascades, see
+        cascade_log.summarize().
+
+        Parameters
+        ----------
+        sizes: The number of infected vertices of each cascade
+        last_day: The last day on which each cascade infected a vertex
+        k: The maximum number of days of the run
+        """
+        sizes = np.asarray(sizes)
+        last_day = np.asarray(last_day)
+
+        # A cascade with infections on the last simulated day (k - 2) was cut off by the cap
+        self.days.extend((last_day + 1).tolist())
+        self.infected.extend(sizes.tolist())
+        self.capped.extend(((sizes > 0) & (last_day >= k - 2)).tolist())
+
+    def summary(self):
+        """
+        Returns the recorded data as a JSON-serialisable dict.
+        """
+        cascades = {"count": len(self.infected),
+                    "days": self.days,
+                    "infected": self.infected,
+                    "capped": self.capped,
+                    "num_capped": int(sum(self.capped))}
+        if self.infected:
+            cascades["mean_days"] = float(np.mean(self.days))
+            cascades["mean_infected"] = float(np.mean(self.infected))
+
+        return {"phases": self.phases, "cascades": cascades}
+
+    def dump(self, path, **params):
+        """
+        Writes summary() to path as JSON, together with the run parameters.
+        """
+        with open(path, "w") as out:
+            json.dump(dict(self.summary(), params = params), out, indent = 1)
+
+
+@contextmanager
+def maybe_phase(profiler, name):
+    """
+    profiler.phase(name) when a profiler is given, a no-op otherwise.
+    """
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name):
+            yield
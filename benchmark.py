@@ -0,0 +1,123 @@
+import sys
+import os
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+import scipy
+from scipy import sparse
+import algorithm.algo as aa
+import algorithm.evaluate as ae
+import algorithm.graphs as ag
+
+# --------------------------------------------------------------------- #
+#       Benchmark of the phases of the learners on the shipped graphs   #
+# --------------------------------------------------------------------- #
+# Each graph is timed phase by phase: simulating the cascades (batched and
+# frontier engines), accumulating the statistics, selecting the candidate
+# edges, estimating the weights and evaluating EC / MAE. Every phase is
+# repeated and its min / median wall time is appended as one JSON line per
+# (graph, phase) to the output file, tagged with the current commit, so
+# runs can be compared across commits.
+
+DEFAULT_GRAPHS = ["tree_500", "tree_2000", "tree_5000", "tree_10000",
+                  "gnp_500", "gnp_2000", "gnp_5000",
+                  "newman", "bio", "econ", "router", "bio2", "retweet", "erdos", "retweet2", "social", "fb"]
+
+REPEAT = 3
+
+
+def commit_id():
+    """
+    Returns the git commit of the checkout this file is in (wherever it is
+    run from), or None outside a git checkout.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd = os.path.dirname(os.path.abspath(__file__)), stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(function, repeat = REPEAT):
+    """
+    Runs function repeat times and returns (result of the last run, list of wall times).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def benchmark_graph(name, num_of_cascade, seed = 0):
+    """
+    Description
+    -----------
+    Times every phase of the learners on one graph.
+
+    Output
+    ------
+    A list of (phase, times, extra) tuples
+    """
+    setting = ag.graph_setting(name)
+    family, p, max_d, k = setting["family"], setting["p"], setting["max_d"], setting["k"]
+    A, times = timed(lambda: ag.load_graph(name))
+    rows = [("load", times, {})]
+
+    # Simulation
+    rng = lambda: np.random.default_rng(seed)
+    v_day, times = timed(lambda: aa.run_cascades(A, p, k, num_of_cascade, rng()))
+    rows.append(("simulate_batch", times, {"infected_per_cascade": float((v_day != aa.NEVER).sum(axis = 0).mean())}))
+    _, times = timed(lambda: aa.run_cascades_frontier(A, p, k, num_of_cascade, rng()))
+    rows.append(("simulate_frontier", times, {}))
+
+    # Accumulation
+    (H, F, J), times = timed(lambda: aa.cascade_statistics(v_day))
+    rows.append(("accumulate", times, {"co_infected_pairs": int(H.nnz)}))
+
+    # Selection and estimation
+    if family == "tree":
+        edges, times = timed(lambda: aa.maximum_spanning_tree(sparse.triu(H, k = 1), np.shape(A)[0]))
+        rows.append(("select", times, {"edges": len(edges)}))
+        predicted_p, times = timed(lambda: aa.estimate_tree_weight(F, J, num_of_cascade))
+        rows.append(("estimate", times, {}))
+    else:
+        edges, times = timed(lambda: aa.select_degree_bounded_edges(H, max_d))
+        rows.append(("select", times, {"edges": len(edges)}))
+        predicted_p, times = timed(lambda: aa.estimate_degree_bounded_weight(H, F, J, num_of_cascade))
+        rows.append(("estimate", times, {}))
+
+    # Evaluation
+    EC, times = timed(lambda: ae.edge_correctness(A, edges))
+    rows.append(("evaluate_ec", times, {"EC": EC}))
+    mae, times = timed(lambda: ae.mean_absolute_error(A, predicted_p, p))
+    rows.append(("evaluate_mae", times, {"MAE": mae}))
+
+    return rows
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else "bench_results.jsonl" # the JSON lines file to append to
+    num_of_cascade = int(sys.argv[2]) if len(sys.argv) > 2 else 20 # the number of cascades
+    graphs = sys.argv[3:] if len(sys.argv) > 3 else DEFAULT_GRAPHS # tree_500, gnp_1000, newman, ...
+
+    header = {"commit": commit_id(),
+              "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(),
+              "numpy": np.__version__,
+              "scipy": scipy.__version__,
+              "num_of_cascade": num_of_cascade,
+              "repeat": REPEAT}
+
+    with open(output, "a") as out:
+        for name in graphs:
+            if not os.path.exists(ag.graph_path(name)):
+                print("Skipping {}: no such graph".format(name))
+                continue
+
+            for phase, times, extra in benchmark_graph(name, num_of_cascade):
+                record = dict(header, graph = name, phase = phase, min_s = min(times), median_s = float(np.median(times)), **extra)
+                out.write(json.dumps(record) + "\n")
+                print("{:>12} {:>18}: {:.4f} s".format(name, phase, min(times)))
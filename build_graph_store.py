@@ -0,0 +1,29 @@
+import sys
+import glob
+import os
+import time
+import algorithm.graphs as ag
+import algorithm.graph_store as gs
+
+# ------------------------------------------------------------ #
+#       Convert the shipped npz graphs to the graph store      #
+# ------------------------------------------------------------ #
+# Writes the memory-mappable <name>.csr directory of every npz graph under
+# random_network/ and real_network/ (see algorithm/graph_store.py). Stores
+# that are already current are left alone unless --force is given.
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    paths = [path for path in sys.argv[1:] if path != "--force"]
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(ag.ROOT, "random_network", "*", "*.npz")) +
+                       glob.glob(os.path.join(ag.ROOT, "real_network", "*", "*.npz")))
+
+    for path in paths:
+        if not force and gs.is_current(path):
+            print("{}: up to date".format(path))
+            continue
+
+        start = time.time()
+        directory = gs.convert(path)
+        print("{} -> {} ({} s)".format(path, directory, round(time.time() - start, 3)))
@@ -0,0 +1,29 @@
+import sys
+import os
+import time
+from scipy import sparse
+import algorithm.graphs as ag
+import algorithm.diameter as ad
+
+# ------------------------------------------------ #
+#       Diameter of a graph by BFS bounds          #
+# ------------------------------------------------ #
+# Prints the diameter of the largest connected component of a graph (see
+# algorithm/diameter.py), or bounds on it when a BFS budget is given and
+# runs out.
+
+if __name__ == "__main__":
+    graph = sys.argv[1] # an npz file or the name of a shipped graph (tree_500, gnp_1000, newman, ...)
+    max_bfs = int(sys.argv[2]) if len(sys.argv) > 2 else None # the maximum number of BFS
+
+    path = graph if os.path.exists(graph) else ag.graph_path(graph)
+    A = sparse.load_npz(path)
+
+    start = time.time()
+    lower, upper, num_bfs = ad.diameter_bounds(A, max_bfs)
+    end = time.time()
+
+    if lower == upper:
+        print("Diameter: {} ({} BFS, {} s)".format(lower, num_bfs, round(end - start, 3)))
+    else:
+        print("Diameter between {} and {} ({} BFS, {} s)".format(lower, upper, num_bfs, round(end - start, 3)))
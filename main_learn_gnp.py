@@ -1,6 +1,9 @@
 import sys
 import time
 import algorithm.algo as aa
+import algorithm.profiling as ap
+import algorithm.graph_store as gs
+import algorithm.metadata as am
 import math
 import numpy as np
 from scipy import sparse
@@ -11,10 +14,14 @@ if __name__ == "__main__":
     exp_type = int(sys.argv[1]) # 0: learn the structure, 1: learn the weight
     n = int(sys.argv[2]) # the size of the network
     num_of_cascade = int(sys.argv[3]) # the number of cascades
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1 # the number of worker processes
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else None # the seed of the cascades
+    profile_path = sys.argv[6] if len(sys.argv) > 6 else None # where to dump the per-phase profile as JSON
+    profiler = ap.Profiler() if profile_path is not None else None
 
     path = "random_network/degree_bounded/gnp_" + str(n) + ".npz"
-    A = sparse.load_npz(path)
-    max_d = 15
+    A = gs.load(path)
+    max_d = am.graph_metadata(path)["max_degree"] # the measured maximum degree
     p = 0.15
     max_iter = 1000
 
@@ -23,10 +30,10 @@ if __name__ == "__main__":
 
     if exp_type == 0:
         # learn_degree_bounded_structure(A, p, k, max_d, num_of_cascade)
-        result = aa.learn_degree_bounded_structure(A, p, max_iter, max_d, num_of_cascade)
+        result = aa.learn_degree_bounded_structure(A, p, max_iter, max_d, num_of_cascade, num_workers, seed, profiler = profiler)
     elif exp_type == 1:
         # learn_degree_bounded_weight(A, p, k, num_of_cascade)
-        result = aa.learn_degree_bounded_weight(A, p, max_iter, num_of_cascade)
+        result = aa.learn_degree_bounded_weight(A, p, max_iter, num_of_cascade, num_workers, seed, profiler = profiler)
     else:
         raise ValueError('Please input 0: learn the structure or 1: learn the weight') 
 
@@ -39,3 +46,7 @@ if __name__ == "__main__":
         print("The edge correctness is:{}".format(round(result, 5)))
     else:
         print("The average mean error is:{}".format(round(result, 5)))
+
+    if profiler is not None:
+        profiler.dump(profile_path, graph = "gnp_" + str(n), exp_type = exp_type, num_of_cascade = num_of_cascade,
+                      num_workers = num_workers, seed = seed, total_s = end - start, result = result)
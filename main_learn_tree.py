@@ -1,6 +1,8 @@
 import sys
 import time
 import algorithm.algo as aa
+import algorithm.profiling as ap
+import algorithm.graph_store as gs
 import math
 import numpy as np
 from scipy import sparse
@@ -11,6 +13,10 @@ if __name__ == "__main__":
     exp_type = int(sys.argv[1]) # 0: learn the structure, 1: learn the weight
     n = int(sys.argv[2]) # the size of the network
     num_of_cascade = int(sys.argv[3]) # The number of cascades
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1 # the number of worker processes
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else None # the seed of the cascades
+    profile_path = sys.argv[6] if len(sys.argv) > 6 else None # where to dump the per-phase profile as JSON
+    profiler = ap.Profiler() if profile_path is not None else None
     
     if exp_type == 0:
         # learn_tree_structure(A, p, k, num_of_cascade)
@@ -23,18 +29,18 @@ if __name__ == "__main__":
 
     path = "random_network/tree/tree_" + str(n) + ".npz"
 
-    A = sparse.load_npz(path)
+    A = gs.load(path)
     p = 0.9
     max_iter = 1000
 
-    # The starting processing time
-    start = time.process_time()
+    # The starting wall-clock time
+    start = time.time()
 
     # Run the learning funciton: THIS TAKES A LONG TIME 
-    result = f(A, p, max_iter, num_of_cascade)
+    result = f(A, p, max_iter, num_of_cascade, num_workers, seed, profiler = profiler)
 
-    # The ending processing time
-    end = time.process_time()
+    # The ending wall-clock time
+    end = time.time()
 
     print("The time in seconds for tree of size {} with {} cascades is: {} s".format(n, num_of_cascade, round(end-start, 3)))
 
@@ -42,3 +48,7 @@ if __name__ == "__main__":
         print("The edge correctness is:{}".format(round(result, 5)))
     else:
         print("The average mean error is:{}".format(round(result, 5)))
+
+    if profiler is not None:
+        profiler.dump(profile_path, graph = "tree_" + str(n), exp_type = exp_type, num_of_cascade = num_of_cascade,
+                      num_workers = num_workers, seed = seed, total_s = end - start, result = result)
@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+import numpy as np
+import algorithm.prep as prep
+
+# ---------------------------------------------------- #
+#       Prepare the real networks from the raw data    #
+# ---------------------------------------------------- #
+# Runs the data preparation pipeline of algorithm/prep.py on the networks
+# of real_network/: largest connected component, g1 edge list, ground truth
+# mapping, adjacency matrix (.npz) and the perturbed copies g2. A rebuilt
+# network has the same edges up to a relabelling of its vertices, so its
+# files differ from the shipped ones and change the results of existing
+# experiments; networks whose files exist are therefore skipped unless
+# --force is given.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def prepared_files(directory, prefix):
+    """
+    Returns the files of a network that prepare_network() would overwrite and that already exist.
+    """
+    names = [os.path.basename(os.path.normpath(directory)) + ".npz", prefix + "_g1.edges", prefix + "_gt_mapping.txt"]
+    return [name for name in names if os.path.exists(os.path.join(directory, name))]
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    arguments = [argument for argument in sys.argv[1:] if argument != "--force"]
+    names = arguments[0].split(",") if len(arguments) > 0 else sorted(prep.NETWORKS) # bio, fb, social, ... (comma separated)
+    seed = int(arguments[1]) if len(arguments) > 1 else None # the seed of the mapping and the perturbations
+
+    rng = np.random.default_rng(seed)
+    for name in names:
+        if name not in prep.NETWORKS:
+            raise ValueError('Unknown network {}, please use one of {}'.format(name, sorted(prep.NETWORKS)))
+
+        raw_file, prefix = prep.NETWORKS[name]
+        directory = os.path.join(ROOT, "real_network", name)
+        if not os.path.exists(os.path.join(directory, raw_file)):
+            print("Skipping {}: no raw edge list {}".format(name, raw_file))
+            continue
+        existing = prepared_files(directory, prefix)
+        if existing and not force:
+            print("Skipping {}: {} already exist (pass --force to overwrite them)".format(name, ", ".join(existing)))
+            continue
+
+        start = time.time()
+        prep.prepare_network(directory, raw_file, prefix, rng = rng)
+        print("Prepared {} in {} s".format(name, round(time.time() - start, 3)))
@@ -1,20 +1,20 @@
-import networkx as nx
+import os
 import sys
 import numpy as np
 from scipy import sparse
-import numpy as np
-from scipy.sparse import diags
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import algorithm.generators as gen
 
 n = int(sys.argv[1]) # The number of vertices
 p = float(sys.argv[2]) # The probability of edge creation
+max_d = int(sys.argv[3]) if len(sys.argv) > 3 else None # The maximum degree (optional)
+seed = int(sys.argv[4]) if len(sys.argv) > 4 else None # The seed (optional)
 
-G = nx.generators.random_graphs.fast_gnp_random_graph(n, p)
+A = gen.gnp_graph(n, p, max_d, np.random.default_rng(seed))
 
-print(nx.info(G))
+print("Number of nodes: {}\nNumber of edges: {}\nMaximum degree: {}".format(n, A.nnz // 2, np.diff(A.indptr).max() if n else 0))
 
 path = "degree_bounded/gnp_" + str(n) + ".npz"
 
-A = nx.to_scipy_sparse_matrix(G)
-
 sparse.save_npz(path, A)
-
@@ -1,19 +1,18 @@
-import networkx as nx
+import os
 import sys
 import numpy as np
 from scipy import sparse
-import numpy as np
-from scipy.sparse import diags
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import algorithm.generators as gen
 
 n = int(sys.argv[1]) # The number of vertices
+seed = int(sys.argv[2]) if len(sys.argv) > 2 else None # The seed (optional)
 
-G = nx.generators.trees.random_tree(n)
+A = gen.random_tree(n, np.random.default_rng(seed))
 
-print(nx.info(G))
+print("Number of nodes: {}\nNumber of edges: {}".format(n, A.nnz // 2))
 
 path = "tree/tree_" + str(n) + ".npz"
 
-A = nx.to_scipy_sparse_matrix(G)
-
 sparse.save_npz(path, A)
-
@@ -1,14 +0,0 @@
-import networkx as nx
-import numpy as np
-from scipy import sparse
-
-G = nx.read_edgelist("econ_g1.edges")
-
-print(nx.info(G))
-
-path_1 = "econ.npz"
-
-A_1 = nx.to_scipy_sparse_matrix(G)
-
-sparse.save_npz(path_1, A_1)
-
@@ -1,5 +1,9 @@
-import networkx as nx  
-
-g1 = nx.read_edgelist("retweet_2_g1.edges")
-
-print("Diameter: ", nx.diameter(g1))
\ No newline at end of file
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+import algorithm.metadata as am
+
+meta = am.graph_metadata(os.path.join(os.path.dirname(os.path.abspath(__file__)), "retweet_2.npz"))
+
+print("Diameter: ", meta["diameter"])
@@ -0,0 +1,173 @@
+import sys
+import os
+import json
+import time
+import itertools
+import multiprocessing
+import algorithm.algo as aa
+import algorithm.graphs as ag
+import algorithm.profiling as ap
+
+# ---------------------------------------------------------------- #
+#       Resumable parameter sweeps over graphs, tasks and seeds    #
+# ---------------------------------------------------------------- #
+# A sweep spec is a JSON file such as
+#
+#     {"graphs": ["tree_500", "tree_1000", "gnp_500", "newman"],
+#      "tasks": ["structure", "weight"],
+#      "cascades": [10, 20, 30],
+#      "seeds": [0, 1, 2],
+#      "num_workers": 8,
+#      "output": "results.jsonl"}
+#
+# Every (graph, task, cascades, seed) point is one job. The jobs are run on
+# a pool of num_workers processes; each worker keeps the graphs it has
+# loaded, and the jobs are ordered by graph so a worker rarely loads more
+# than one. Each finished point is appended to the output file as one JSON
+# line (result, timings, parameters, seed), and the points already in the
+# file are skipped, so an interrupted sweep resumes where it stopped.
+
+TASKS = ("structure", "weight")
+
+GRAPH_CACHE_SIZE = 2 # The number of graphs each worker keeps loaded
+
+worker_graphs = {} # The graphs loaded by this worker, by name
+
+
+def get_graph(name):
+    """
+    Returns a shipped graph, loading it only once per worker.
+    """
+    if name not in worker_graphs:
+        if len(worker_graphs) >= GRAPH_CACHE_SIZE:
+            worker_graphs.pop(next(iter(worker_graphs)))
+        worker_graphs[name] = ag.load_graph(name)
+    return worker_graphs[name]
+
+
+def point_key(point):
+    """
+    The identity of a sweep point, used to skip completed points.
+    """
+    return (point["graph"], point["task"], int(point["num_of_cascade"]), point["seed"])
+
+
+def run_point(point):
+    """
+    Description
+    -----------
+    Runs one sweep point with the setting of its graph (see
+    graphs.graph_setting()) and returns its result row.
+    """
+    name, task, num_of_cascade, seed = point_key(point)
+    setting = ag.graph_setting(name)
+    p, k, max_d, simulator = setting["p"], setting["k"], setting["max_d"], setting["simulator"]
+
+    start = time.time()
+    A = get_graph(name)
+    loaded = time.time()
+
+    profiler = ap.Profiler(trace_memory = False)
+    options = {"seed": seed, "simulator": simulator, "profiler": profiler}
+    if setting["family"] == "tree":
+        if task == "structure":
+            result = aa.learn_tree_structure(A, p, k, num_of_cascade, **options)
+        else:
+            result = aa.learn_tree_weight(A, p, k, num_of_cascade, **options)
+    else:
+        if task == "structure":
+            result = aa.learn_degree_bounded_structure(A, p, k, max_d, num_of_cascade, **options)
+        else:
+            result = aa.learn_degree_bounded_weight(A, p, k, num_of_cascade, **options)
+    end = time.time()
+
+    summary = profiler.summary()
+    return dict(point,
+                metric = "EC" if task == "structure" else "MAE",
+                result = result,
+                reported = result if task == "structure" else setting["correction"] * result,
+                n = int(A.shape[0]), p = p, k = k, max_d = max_d, simulator = simulator,
+                load_s = loaded - start, run_s = end - loaded,
+                phases = {phase: entry["wall_s"] for phase, entry in summary["phases"].items()},
+                num_capped = summary["cascades"]["num_capped"],
+                date = time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+
+def expand(spec):
+    """
+    Returns the sweep points of a spec, ordered by graph.
+    """
+    tasks = spec.get("tasks", list(TASKS))
+    for task in tasks:
+        if task not in TASKS:
+            raise ValueError('Unknown task {}, please use one of {}'.format(task, TASKS))
+
+    points = []
+    for name, task, num_of_cascade, seed in itertools.product(spec["graphs"], tasks, spec["cascades"], spec.get("seeds", [0])):
+        points.append({"graph": name, "task": task, "num_of_cascade": int(num_of_cascade), "seed": seed})
+    return points
+
+
+def completed_keys(path):
+    """
+    Returns the keys of the points already in the results file. A partly
+    written last line (from an interrupted run) is ignored.
+    """
+    keys = set()
+    if not os.path.exists(path):
+        return keys
+
+    with open(path) as results:
+        for line in results:
+            try:
+                keys.add(point_key(json.loads(line)))
+            except (ValueError, KeyError):
+                continue
+    return keys
+
+
+def run_sweep(spec):
+    """
+    Description
+    -----------
+    Runs every point of a sweep spec that is not in its output file yet and
+    appends the results as they finish.
+    """
+    output = spec.get("output", "results.jsonl")
+    num_workers = int(spec.get("num_workers", 1))
+
+    done = completed_keys(output)
+    points = [point for point in expand(spec) if point_key(point) not in done]
+    for name in sorted(set(point["graph"] for point in points)):
+        if not os.path.exists(ag.graph_path(name)):
+            raise ValueError('No such graph: {}'.format(name))
+        # Fill the metadata cache and build the graph store here, so the workers only read them
+        ag.graph_setting(name)
+        ag.load_graph(name)
+    print("{} points to run, {} already done".format(len(points), len(done)))
+
+    with open(output, "a") as results:
+        if num_workers > 1:
+            pool = multiprocessing.Pool(num_workers)
+            rows = pool.imap_unordered(run_point, points)
+        else:
+            pool = None
+            rows = map(run_point, points)
+
+        try:
+            for row in rows:
+                results.write(json.dumps(row) + "\n")
+                results.flush()
+                print("{} {} {} cascades, seed {}: {} = {} ({} s)".format(row["graph"], row["task"], row["num_of_cascade"], row["seed"], row["metric"], round(row["reported"], 5), round(row["run_s"], 3)))
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+
+if __name__ == "__main__":
+    spec_path = sys.argv[1] # the JSON sweep spec
+
+    with open(spec_path) as spec_file:
+        spec = json.load(spec_file)
+
+    run_sweep(spec)
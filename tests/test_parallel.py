@@ -0,0 +1,35 @@
+import numpy as np
+import algorithm.algo as aa
+import algorithm.generators as ag
+
+# ---------------------------------------------------- #
+#       Parallel blocks merged as they are streamed    #
+# ---------------------------------------------------- #
+
+
+def assert_same_counts(left, right):
+    for x, y in zip(left, right):
+        if isinstance(x, np.ndarray):
+            assert np.array_equal(x, y)
+        else:
+            assert (x != y).nnz == 0
+
+
+def test_statistics_do_not_depend_on_the_number_of_workers():
+    A = ag.random_tree(200, rng = np.random.default_rng(0))
+    num_of_cascade = 3 * aa.CASCADE_BLOCK + 7
+
+    serial = aa.simulate_statistics(A, 0.4, 1000, num_of_cascade, num_workers = 1, seed = 11)
+    parallel = aa.simulate_statistics(A, 0.4, 1000, num_of_cascade, num_workers = 3, seed = 11)
+    assert_same_counts(serial, parallel)
+    assert serial[2].sum() > num_of_cascade
+
+
+def test_blocks_are_streamed_in_block_order():
+    A = ag.random_tree(100, rng = np.random.default_rng(1))
+    num_of_cascade = 2 * aa.CASCADE_BLOCK + 1
+
+    blocks = aa.run_blocks(A, 0.4, 1000, num_of_cascade, 2, 5, aa.block_cascades)
+    assert not isinstance(blocks, list)
+    sizes = [np.size(offsets) - 1 for offsets, _, _ in blocks]
+    assert sizes == [aa.CASCADE_BLOCK, aa.CASCADE_BLOCK, 1]
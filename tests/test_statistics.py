@@ -0,0 +1,57 @@
+import numpy as np
+from scipy import sparse
+import algorithm.algo as aa
+
+# -------------------------------------------- #
+#       Co-infection counts of the learners    #
+# -------------------------------------------- #
+
+
+def random_infections(n, num_of_cascade, size, seed):
+    """
+    Distinct random (node, cascade) infections.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.unique(rng.integers(0, n, size) * num_of_cascade + rng.integers(0, num_of_cascade, size))
+    return keys // num_of_cascade, keys % num_of_cascade
+
+
+def test_upper_coinfection_is_the_upper_triangle():
+    n, num_of_cascade = 300, 150
+    # A dense batch (bitset popcounts) and a sparse one (X^T X)
+    for size in (20000, 2000):
+        node, c = random_infections(n, num_of_cascade, size, size)
+        H, J = aa.coinfection_statistics(node, c, n, num_of_cascade)
+        U, J_upper = aa.coinfection_statistics(node, c, n, num_of_cascade, upper = True)
+        assert (sparse.triu(H, k = 1) != U).nnz == 0
+        assert sparse.tril(U).nnz == 0
+        assert np.array_equal(J, J_upper)
+
+
+def test_bitset_counts_over_several_words():
+    # More than 64 cascades, so the bitsets span several words, the last one partly used
+    n, num_of_cascade = 200, 150
+    node, c = random_infections(n, num_of_cascade, 12000, 0)
+    H, J = aa.bitset_coinfection(node, c, n, num_of_cascade)
+
+    X = sparse.csr_matrix((np.ones(node.size, dtype = 'int64'), (c, node)), shape = (num_of_cascade, n))
+    expected = sparse.csr_matrix(X.T @ X)
+    assert np.array_equal(J, expected.diagonal())
+    expected.setdiag(0)
+    assert (H != expected).nnz == 0
+
+
+def test_dense_blocks_match_one_sparse_pass(monkeypatch):
+    # Several blocks of dense cascades, counted with bitsets block by block and with X^T X at once
+    A = sparse.csr_matrix(np.ones((60, 60)) - np.eye(60))
+    num_of_cascade = 2 * aa.CASCADE_BLOCK + 22
+    H, F, J = aa.simulate_statistics(A, 0.05, 1000, num_of_cascade, seed = 2)
+
+    offsets, nodes, days = aa.cl.concatenate(aa.run_blocks(A, 0.05, 1000, num_of_cascade, 1, 2, aa.block_cascades))
+    node, c, t = aa.cl.triplets(offsets, nodes, days)
+    assert node.size > aa.BITSET_DENSITY * 60 * num_of_cascade
+    monkeypatch.setattr(aa, "BITSET_DENSITY", np.inf)
+    expected = aa.infection_statistics(node, c, t, 60, num_of_cascade)
+    for x, y in zip((H, F), expected[:2]):
+        assert (x != y).nnz == 0
+    assert np.array_equal(J, expected[2])